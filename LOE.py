@@ -5,12 +5,16 @@ from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 import pandas as pd
 import os
+from aliases import AdvisorDirectory
+from failures import letter_problems, report_problems
+from workbook_loader import load_csv, load_sheets
 
 file_path = 'EW - Details of Professional Fees Paid for last 7 years 1.xlsx'
 address_file_path = 'EW Master 1(Master Data).csv' 
 sheet_names = ['2018-19']
 
-address_data = pd.read_csv(address_file_path)
+address_data = load_csv(address_file_path)
+sheets = load_sheets(file_path, sheet_names)
 
 def set_font(paragraph, font_name="Roboto", font_size=11):
     for run in paragraph.runs:
@@ -31,8 +35,8 @@ def set_table_font(table, font_name="Roboto", font_size=11):
 
 for sheet in sheet_names:
     year_folder = sheet.replace('/', '-')
-    master_data = pd.read_csv('EW Master 1(Master Data).csv')
-    data = pd.read_excel('EW - Details of Professional Fees Paid for last 7 years.xlsx', sheet_name=sheet)
+    master_data = address_data
+    data = sheets[sheet]
     trading_advisor_list = list(data['TRADING ADVISOR'].drop_duplicates().dropna())
     filtered_data = data[['TRADING ADVISOR', 'PAYEE', 'PAN']]
     grouped_data_by_advisor = filtered_data.groupby('TRADING ADVISOR')
@@ -41,16 +45,15 @@ for sheet in sheet_names:
         "PAYEE": list
     }).reset_index()
 
-    for current_trading_advisor in trading_advisor_list:
-        current_trading_advisor = current_trading_advisor.strip()
-        if current_trading_advisor == "MITESH DOSHI":
-            current_trading_advisor = "MITESH JAYANTIBHAI DOSHI"
-        elif current_trading_advisor == "MITUL MORABIA":
-            current_trading_advisor = "MITUL MOHANLAL MORABIYA"
+    # Resolve every advisor up front; those missing from the master data or
+    # with no address there are reported and skipped
+    directory = AdvisorDirectory(master_data, 'Name')
+    resolved, problems = letter_problems(trading_advisor_list, directory)
+    report_problems(problems, 'letter', year_folder)
 
+    for register_name, (current_trading_advisor, address, advisor_pan) in resolved.items():
         # Address lookup
-        current_trading_advisor_new = master_data[master_data['Name'] == current_trading_advisor]
-        current_trading_advisor_address = current_trading_advisor_new['Address'].iloc[0].split(", ")
+        current_trading_advisor_address = address.split(", ")
         address_text = "\n".join(current_trading_advisor_address[:4])
 
         # Initialize the document
@@ -122,7 +125,7 @@ for sheet in sheet_names:
         sign_table.autofit = True
 
         sign_table.cell(0, 0).text = "For Elixir Equities Pvt Ltd,\n\n\n\nDipan Mehta\nDirector"
-        sign_table.cell(0, 1).text = f"I Accept\n\n\n\nName: {current_trading_advisor} \nPAN : {current_trading_advisor_new['PAN'].iloc[0]}"
+        sign_table.cell(0, 1).text = f"I Accept\n\n\n\nName: {current_trading_advisor} \nPAN : {advisor_pan}"
 
         set_table_font(sign_table, font_name="Roboto", font_size=11)
 
@@ -134,8 +137,8 @@ for sheet in sheet_names:
         )
 
         # Get PAYEE list and PAN list
-        current_payee = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == current_trading_advisor]['PAYEE'].iloc[0]
-        current_pan = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == current_trading_advisor]['PAN'].iloc[0]
+        current_payee = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == register_name]['PAYEE'].iloc[0]
+        current_pan = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == register_name]['PAN'].iloc[0]
 
         table = doc.add_table(rows=len(current_payee)+1, cols=2)
         table.style = 'Table Grid'
@@ -0,0 +1,287 @@
+"""
+Resolve advisor names as written in the payment registers to their
+spelling in the master data, through an alias file and, for names it does
+not cover, proposed matches from a similarity index.
+
+advisor_aliases.csv has one row per alias:
+    Register name,Master name
+    MITESH DOSHI,MITESH JAYANTIBHAI DOSHI
+
+To propose aliases for every register advisor missing from the master data:
+    python aliases.py --propose
+and, after checking them, add the confident ones to the alias file:
+    python aliases.py --propose --accept 0.9
+"""
+import argparse
+import difflib
+import os
+from collections import Counter
+
+import pandas as pd
+
+from name_index import normalize_name
+
+ALIAS_FILE = 'advisor_aliases.csv'
+ALIAS_COLUMNS = ['Register name', 'Master name']
+
+# Character n-grams the similarity index blocks on, and the n-grams a
+# master name must share with a search name to be scored at all
+NGRAM = 3
+MIN_SHARED_NGRAMS = 2
+
+# Proposals scoring below this are not shown
+MIN_SCORE = 0.6
+
+
+def name_key(name):
+    """Upper-case a name and collapse its whitespace: the key names are compared on."""
+    return ' '.join(normalize_name(name))
+
+
+def load_aliases(path=ALIAS_FILE):
+    """
+    Read the alias file.
+
+    Returns:
+    - dict: name_key(register name) -> master name. Empty when the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    aliases = pd.read_csv(path, dtype=str).dropna(subset=ALIAS_COLUMNS)
+    return {name_key(register): master.strip()
+            for register, master in zip(aliases['Register name'], aliases['Master name'])}
+
+
+def save_aliases(aliases, path=ALIAS_FILE):
+    """Write {register name: master name} to the alias file, sorted by register name."""
+    rows = sorted(aliases.items())
+    pd.DataFrame(rows, columns=ALIAS_COLUMNS).to_csv(path, index=False)
+
+
+def _ngrams(key):
+    padded = f" {key} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def _ratio(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def _token_score(search_tokens, tokens):
+    """Mean, over the search tokens, of the best similarity to any of tokens."""
+    return sum(max(_ratio(search, token) for token in tokens) for search in search_tokens) / len(search_tokens)
+
+
+def _ends_score(search_tokens, tokens):
+    """Similarity of the first names and of the surnames (first and last tokens, in name order)."""
+    return (_ratio(search_tokens[0], tokens[0]) + _ratio(search_tokens[-1], tokens[-1])) / 2
+
+
+class SimilarityIndex:
+    """
+    Proposes the closest names for names that match nothing exactly.
+
+    Names are keyed by their tokens in sorted order, so word order does not
+    matter, and blocked on the character n-grams of that key: only names
+    sharing at least MIN_SHARED_NGRAMS n-grams with the search name are
+    scored. Candidates are ranked by:
+    - token score: how well each search token matches one of its tokens, so
+      'MITESH DOSHI' scores 1.0 against 'MITESH JAYANTIBHAI DOSHI'
+    - then how well the first names and surnames match, so that name ranks
+      above 'HEMANGI MITESH DOSHI'
+    - then the sorted score: difflib ratio of the token-sorted keys
+
+    Parameters:
+    - names (iterable): The names to propose from, e.g. the master data names.
+    """
+
+    def __init__(self, names):
+        self.names = []
+        self.tokens = []         # tokens in name order
+        self.keys = []
+        self.blocks = {}         # n-gram -> ids of names containing it
+        seen = set()
+        for name in names:
+            if not isinstance(name, str) or name_key(name) in seen:
+                continue
+            seen.add(name_key(name))
+            tokens = normalize_name(name)
+            name_id = len(self.names)
+            self.names.append(name.strip())
+            self.tokens.append(tokens)
+            self.keys.append(' '.join(sorted(tokens)))
+            for ngram in _ngrams(self.keys[-1]):
+                self.blocks.setdefault(ngram, []).append(name_id)
+
+    def candidates(self, name, limit=3, min_score=MIN_SCORE):
+        """
+        The closest names to name.
+
+        Returns:
+        - list: (name, token score, sorted score) tuples, best first.
+        """
+        tokens = normalize_name(name)
+        if not tokens:
+            return []
+        key = ' '.join(sorted(tokens))
+
+        shared = Counter(name_id for ngram in _ngrams(key) for name_id in self.blocks.get(ngram, ()))
+        scored = []
+        for name_id, count in shared.items():
+            if count < MIN_SHARED_NGRAMS:
+                continue
+            token_score = _token_score(tokens, self.tokens[name_id])
+            if token_score < min_score:
+                continue
+            ends_score = _ends_score(tokens, self.tokens[name_id])
+            sorted_score = _ratio(key, self.keys[name_id])
+            scored.append((self.names[name_id], round(token_score, 3), round(sorted_score, 3), ends_score))
+        scored.sort(key=lambda item: (-item[1], -item[3], -item[2], item[0]))
+        return [candidate[:3] for candidate in scored[:limit]]
+
+    def propose(self, names, limit=3, min_score=MIN_SCORE):
+        """
+        Candidates for many names at once.
+
+        Returns:
+        - DataFrame: Register name, Proposed name, Token score, Sorted score;
+          up to limit rows per name, best first. Names with no candidate get
+          one row with no proposal.
+        """
+        rows = []
+        for name in names:
+            found = self.candidates(name, limit, min_score)
+            rows.extend((name, *candidate) for candidate in found)
+            if not found:
+                rows.append((name, None, None, None))
+        return pd.DataFrame(rows, columns=['Register name', 'Proposed name', 'Token score', 'Sorted score'])
+
+
+class AdvisorDirectory:
+    """
+    Advisor -> name, address and PAN as given in the master data.
+
+    A register name resolves through the alias file first, then to the
+    master row with the same name (ignoring case and extra spaces); the
+    first such row wins. Names that resolve neither way get proposals from
+    a SimilarityIndex over the master names.
+
+    Parameters:
+    - master_data (DataFrame): The master data.
+    - name_column (str): Column holding the names, e.g. 'Name' or 'NAME'.
+    - address_column (str): Column holding the addresses.
+    - pan_column (str): Column holding the PANs.
+    - aliases (dict): load_aliases(); read from ALIAS_FILE by default.
+    """
+
+    def __init__(self, master_data, name_column, address_column='Address', pan_column='PAN', aliases=None):
+        self.aliases = load_aliases() if aliases is None else aliases
+        self.records = {}        # name_key -> (name, address, PAN) of the first row
+        names = master_data[name_column].tolist()
+        for name, address, pan in zip(names, master_data[address_column].tolist(), master_data[pan_column].tolist()):
+            if isinstance(name, str):
+                self.records.setdefault(name_key(name), (name.strip(), address, pan))
+        self._names = names
+        self._similarity = None
+
+    @property
+    def similarity(self):
+        """SimilarityIndex over the master names, built on first use."""
+        if self._similarity is None:
+            self._similarity = SimilarityIndex(self._names)
+        return self._similarity
+
+    def resolve(self, advisor):
+        """The advisor's record key in the master data, or None."""
+        key = name_key(advisor)
+        key = name_key(self.aliases.get(key, key))
+        return key if key in self.records else None
+
+    def lookup(self, advisor):
+        """
+        The advisor's master data entry.
+
+        Returns:
+        - tuple: (name as in the master data, address, PAN)
+
+        Raises:
+        - KeyError: The advisor is neither in the master data nor aliased to a name that is.
+        """
+        key = self.resolve(advisor)
+        if key is None:
+            raise KeyError(f"{advisor.strip()} is not in the master data; add it to {ALIAS_FILE}")
+        return self.records[key]
+
+    def resolve_all(self, advisors):
+        """
+        Resolve every advisor in one pass.
+
+        Returns:
+        - tuple: ({advisor: (name, address, PAN)} for those found, [advisors not found])
+        """
+        found = {}
+        missing = []
+        for advisor in advisors:
+            key = self.resolve(advisor)
+            if key is None:
+                missing.append(advisor)
+            else:
+                found[advisor] = self.records[key]
+        return found, missing
+
+    def report_missing(self, missing):
+        """Print the advisors with no master data entry and the closest master names."""
+        if not missing:
+            return
+        print(f"\n{len(missing)} advisor(s) not in the master data, skipped; add them to {ALIAS_FILE}:")
+        for advisor in missing:
+            print(f"  {advisor.strip()}: {self.closest(advisor)}")
+
+    def closest(self, advisor):
+        """The closest master names to advisor and their scores, as text."""
+        candidates = self.similarity.candidates(advisor)
+        return ', '.join(f"{name} ({score:.2f})" for name, score, _ in candidates) or 'no close match'
+
+
+def main():
+    from batch import ENTITIES
+    from workbook_loader import load_csv, load_sheets
+
+    parser = argparse.ArgumentParser(description='Propose aliases for register advisors missing from the master data.')
+    parser.add_argument('--propose', action='store_true', help='Propose master names for every unresolved advisor')
+    parser.add_argument('--entity', choices=sorted(ENTITIES), default='EW', help='Registers and master data to use (default: EW)')
+    parser.add_argument('--output', default='alias_proposals.csv', help='CSV the proposals are written to (default: alias_proposals.csv)')
+    parser.add_argument('--accept', type=float, metavar='SCORE', help=f'Add the best proposal scoring at least SCORE to {ALIAS_FILE}')
+    args = parser.parse_args()
+    if not args.propose:
+        parser.error('nothing to do; use --propose')
+
+    config = ENTITIES[args.entity]
+    master_data = load_csv(config['letter_master'], config['letter_master_schema'])
+    name_column = config['letter_name_column']
+    sheets = load_sheets(config['register'], list(config['sheets'].values()), config['letter_register_schema'])
+    advisors = pd.unique(pd.concat([sheet['TRADING ADVISOR'].dropna().astype(str).str.strip()
+                                    for sheet in sheets.values()]))
+
+    aliases = load_aliases()
+    directory = AdvisorDirectory(master_data, name_column, aliases=aliases)
+    _, missing = directory.resolve_all(sorted(advisors))
+    print(f"{len(advisors) - len(missing)} of {len(advisors)} advisors resolve; {len(missing)} do not")
+
+    proposals = directory.similarity.propose(missing)
+    proposals.to_csv(args.output, index=False)
+    print(f"Proposals saved: {args.output}")
+    if len(proposals):
+        print(proposals.to_string(index=False))
+
+    if args.accept is not None:
+        best = proposals.dropna().drop_duplicates('Register name')
+        best = best[best['Token score'] >= args.accept]
+        for register, master in zip(best['Register name'], best['Proposed name']):
+            aliases[name_key(register)] = master
+        save_aliases(aliases)
+        print(f"Added {len(best)} alias(es) to {ALIAS_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Digit grouping of formatted amounts
+INTERNATIONAL = 'international'  # Rs. 1,234,567
+INDIAN = 'indian'                # Rs. 12,34,567 (lakh/crore)
+GROUPINGS = [INTERNATIONAL, INDIAN]
+
+# Amount columns shown on an invoice, and the columns add_amount_texts adds
+AMOUNT_COLUMNS = ['PROFESSIONAL FEES', 'OUT OF POCKET', 'TOTAL AMOUNT']
+PAGE_TOTAL_TEXT = 'PAGE TOTAL TEXT'
+
+
+def amount_text_column(column):
+    """Name of the column holding the formatted amounts of column."""
+    return f"{column} TEXT"
+
+
+AMOUNT_TEXT_COLUMNS = [amount_text_column(column) for column in AMOUNT_COLUMNS] + [PAGE_TOTAL_TEXT]
+
+
+def _indian_digits(amount):
+    digits = str(abs(amount))
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        pairs = [head[max(0, end - 2):end] for end in range(len(head), 0, -2)]
+        digits = ','.join(reversed(pairs)) + ',' + tail
+    return '-' + digits if amount < 0 else digits
+
+
+def format_amounts(values, grouping=INTERNATIONAL):
+    """
+    Format a column of amounts as "Rs. x,xxx" strings in one pass.
+
+    Gives the same strings as calling format_amount on each value: amounts
+    are truncated to whole rupees, and a missing amount raises ValueError
+    just as int(nan) would.
+
+    Parameters:
+    - values (Series or array-like): The amounts.
+    - grouping (str): INTERNATIONAL (1,234,567) or INDIAN (12,34,567).
+
+    Returns:
+    - list: One formatted string per amount.
+    """
+    amounts = np.asarray(values, dtype=float)
+    if np.isnan(amounts).any():
+        raise ValueError("cannot convert float NaN to integer")
+    whole = np.trunc(amounts).astype(np.int64).tolist()
+    if grouping == INDIAN:
+        return [f"Rs. {_indian_digits(amount)}" for amount in whole]
+    return [f"Rs. {amount:,}" for amount in whole]
+
+
+def add_amount_texts(data, grouping=INTERNATIONAL, advisor_column='TRADING ADVISOR', date_column='Invoice Date'):
+    """
+    Format every amount the invoices show, for a whole register in one pass.
+
+    Adds amount_text_column(column) for each of AMOUNT_COLUMNS, and
+    PAGE_TOTAL_TEXT: the TOTAL AMOUNT of each (advisor, invoice date) page,
+    on every row of the page. Rendering then only picks up the strings.
+    Rows that never reach an invoice (no advisor or no invoice date) get None.
+
+    Parameters:
+    - data (DataFrame): The payment register, or one advisor's rows of it.
+    - grouping (str): INTERNATIONAL or INDIAN digit grouping.
+    - advisor_column (str): Column the invoices are grouped by.
+    - date_column (str): Column the invoice pages are grouped by.
+
+    Returns:
+    - DataFrame: A copy of data with the text columns added.
+
+    Raises:
+    - ValueError: An invoiced row has no amount.
+    """
+    keys = [advisor_column, date_column]
+    invoiced = data[keys].notna().all(axis=1).to_numpy()
+    rows = data[invoiced]
+
+    for column in AMOUNT_COLUMNS:
+        missing = rows[column].isna()
+        if missing.any():
+            first = rows[missing].iloc[0]
+            raise ValueError(f"{column} is missing for {first[advisor_column]} on {first[date_column]}")
+
+    result = data.copy()
+    texts = {column: rows[column] for column in AMOUNT_COLUMNS}
+    texts[PAGE_TOTAL_TEXT] = rows.groupby(keys, observed=True, sort=False)['TOTAL AMOUNT'].transform('sum')
+    for column, amounts in texts.items():
+        name = column if column == PAGE_TOTAL_TEXT else amount_text_column(column)
+        values = np.full(len(data), None, dtype=object)
+        values[invoiced] = format_amounts(amounts, grouping)
+        result[name] = values
+    return result
@@ -0,0 +1,266 @@
+"""
+One entry point for the month-end run: invoices and engagement letters for
+EW and DMC, from inputs that are loaded and indexed once.
+
+Usage:
+    python batch.py --entity EW DMC --years 2023-24 --outputs both
+
+Engagement letters are only generated for the years their generator has
+the terms for (its LETTER_YEARS); other years get invoices only.
+
+With --keep-going, advisors whose documents cannot be generated are
+skipped and listed in failures.csv; everything else is still generated.
+Finished documents are journaled in batch_progress.jsonl until the run
+completes; --resume continues an interrupted run without redoing them.
+"""
+import argparse
+import contextlib
+import sys
+
+import final_script_7
+import new_invoice_script_for_dmc
+import new_loe
+import new_loe_dmc
+from aliases import AdvisorDirectory
+from amounts import GROUPINGS, INTERNATIONAL
+from bundle import DocumentBundle
+from failures import FAILURES_FILE, FailureReport
+from fonts import ADVISOR_FONTS
+from journal import ProgressJournal
+from name_index import AddressIndex, NamePanIndex
+from profiling import NULL_PROFILER, RenderProfiler
+from run_report import RunReport
+from schemas import (DMC_LETTER_REGISTER, DMC_MASTER, DMC_REGISTER, EW_INVOICE_MASTER, EW_LETTER_MASTER, EW_LETTER_REGISTER,
+                     EW_REGISTER)
+from team_roster import build_team_roster
+from workbook_loader import load_csv, load_sheets
+from writer import MAX_PENDING, DocumentWriter
+
+# Per entity: the payment register, which sheet holds each year, the master
+# files and the generators
+ENTITIES = {
+    'EW': {
+        'register': final_script_7.file_path,
+        'register_schema': EW_REGISTER,
+        'letter_register_schema': EW_LETTER_REGISTER,
+        'sheets': {sheet.replace('/', '-'): sheet for sheet in final_script_7.sheet_names},
+        'member_column': 'PAYEE',
+        'invoice_master': final_script_7.address_file_path,
+        'invoice_master_schema': EW_INVOICE_MASTER,
+        'invoice_address_columns': ('TRADING ADVISOR', 'ADDRESS'),
+        'letter_master': new_loe.address_file_path,
+        'letter_master_schema': EW_LETTER_MASTER,
+        'letter_name_column': 'Name',
+        'invoices': final_script_7,
+        'letters': new_loe,
+    },
+    'DMC': {
+        'register': new_invoice_script_for_dmc.file_path,
+        'register_schema': DMC_REGISTER,
+        'letter_register_schema': DMC_LETTER_REGISTER,
+        'sheets': {'2022-23': 'REVISED PAYMENTS TO TRADERS'},
+        'member_column': 'TEAM MEMBER',
+        'invoice_master': new_invoice_script_for_dmc.address_file_path,
+        'invoice_master_schema': DMC_MASTER,
+        'invoice_address_columns': ('NAME', 'Address'),
+        'letter_master': new_loe_dmc.address_file_path,
+        'letter_master_schema': DMC_MASTER,
+        'letter_name_column': 'NAME',
+        'invoices': new_invoice_script_for_dmc,
+        'letters': new_loe_dmc,
+    },
+}
+
+OUTPUTS = ['invoices', 'loes', 'both']
+
+# Documents finished by the current run, kept until it completes so an interrupted run can resume
+JOURNAL_FILE = 'batch_progress.jsonl'
+
+# Archive per year (<entity>_<year>.zip) or per entity (<entity>.zip)
+BUNDLE_MODES = ['year', 'entity']
+
+
+class EntityData:
+    """
+    The registers and master data of one entity, read once and shared by
+    the invoice and engagement letter generators. The registers and the
+    per-year structures are loaded the first time a generator asks for them;
+    the letters read them through letter_register_schema, so a malformed
+    amount or date only stops the invoices.
+
+    Parameters:
+    - entity (str): 'EW' or 'DMC'.
+    - years (list): Years to load, e.g. ['2023-24'].
+    - lenient (bool): Load the invoice registers through the lenient schema:
+      a malformed amount or date is noted for the failure report instead of
+      stopping the load.
+    """
+
+    def __init__(self, entity, years, lenient=False):
+        self.entity = entity
+        self.lenient = lenient
+        self.config = ENTITIES[entity]
+        self.years = years
+        self._sheets = {}    # schema name -> sheet name -> DataFrame
+        self._built = {}     # (structure, year) -> per-year structure, built on first use
+        self.invoice_master = load_csv(self.config['invoice_master'], self.config['invoice_master_schema'])
+        self.letter_master = load_csv(self.config['letter_master'], self.config['letter_master_schema'])
+        self.address_index = AddressIndex(self.invoice_master, *self.config['invoice_address_columns'])
+        self.letter_directory = AdvisorDirectory(self.letter_master, self.config['letter_name_column'])
+
+    def _sheet(self, year, schema):
+        if schema.name not in self._sheets:
+            sheet_names = [self.config['sheets'][year] for year in self.years]
+            self._sheets[schema.name] = load_sheets(self.config['register'], sheet_names, schema)
+        return self._sheets[schema.name][self.config['sheets'][year]]
+
+    def register(self, year):
+        """The year's register as the invoices read it, amounts and dates included."""
+        schema = self.config['register_schema']
+        return self._sheet(year, schema.lenient() if self.lenient else schema)
+
+    def letter_register(self, year):
+        """The year's register as the engagement letters read it: advisors, team members and PANs."""
+        schema = self.config['letter_register_schema']
+        if self.config['register_schema'].name in self._sheets:
+            # Already loaded for the invoices; the letters' columns are a subset, stored the same way
+            return self.register(year)[schema.columns]
+        return self._sheet(year, schema)
+
+    def _memo(self, name, year, build):
+        key = (name, year)
+        if key not in self._built:
+            self._built[key] = build()
+        return self._built[key]
+
+    def advisor_groups(self, year):
+        """Advisor (stripped) -> that advisor's register rows for the year."""
+        return self._memo('advisor_groups', year, lambda: {
+            advisor.strip(): group for advisor, group in self.register(year).groupby('TRADING ADVISOR', observed=True)})
+
+    def team_roster(self, year):
+        return self._memo('team_roster', year,
+                          lambda: build_team_roster(self.letter_register(year), self.config['member_column']))
+
+    def pan_index(self, year):
+        return self._memo('pan_index', year, lambda: NamePanIndex(self.register(year)))
+
+
+def run_invoices(inputs, year, workers, report, bundle=None, grouping=None, profiler=NULL_PROFILER, writer=None, failures=None,
+                 journal=None):
+    generator = inputs.config['invoices']
+    if inputs.entity == 'DMC':
+        return generator.create_invoices_for_year(inputs.register(year), inputs.address_index, year, workers,
+                                                  report=report, pan_index=inputs.pan_index(year), bundle=bundle, grouping=grouping, profiler=profiler,
+                                                  writer=writer, failures=failures, journal=journal)
+    return generator.create_invoices_for_year(inputs.register(year), inputs.address_index, year, workers,
+                                              report=report, bundle=bundle, grouping=grouping, profiler=profiler,
+                                              writer=writer, failures=failures, journal=journal)
+
+
+def run_letters(inputs, year, report, bundle=None, profiler=NULL_PROFILER, writer=None, failures=None, journal=None):
+    generator = inputs.config['letters']
+    with report.stage('letters', year):
+        file_names = generator.create_engagement_letters(inputs.letter_register(year), inputs.letter_master, year,
+                                                         team_roster=inputs.team_roster(year), bundle=bundle,
+                                                         profiler=profiler, writer=writer, failures=failures,
+                                                         journal=journal, directory=inputs.letter_directory)
+    report.count('letters', len(file_names), year)
+    return file_names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate invoices and engagement letters in one run.')
+    parser.add_argument('--entity', nargs='+', choices=sorted(ENTITIES), default=sorted(ENTITIES), help='Entities to generate for (default: all)')
+    parser.add_argument('--years', nargs='+', help='Years to generate, e.g. 2023-24 (default: every year in the register)')
+    parser.add_argument('--outputs', choices=OUTPUTS, default='both', help='Documents to generate (default: both)')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to render invoices (default: 1, no pool)')
+    parser.add_argument('--amount-grouping', choices=GROUPINGS, default=INTERNATIONAL, help='Digit grouping of invoice amounts; indian gives Rs. 12,34,567 (default: international)')
+    parser.add_argument('--bundle', choices=BUNDLE_MODES, help='Stream the documents into one ZIP archive per year or per entity instead of loose files')
+    parser.add_argument('--report', metavar='PATH', help='Write stage timings and counters, per year and per advisor, to this JSON file')
+    parser.add_argument('--profile-advisor', nargs='+', metavar='ADVISOR', help='Profile these advisors\' documents (cProfile and tracemalloc); the profiles are written next to the documents')
+    parser.add_argument('--profile-year', nargs='+', metavar='YEAR', help='Only profile in these years; on its own, profile every document of the years')
+    parser.add_argument('--write-queue', type=int, default=MAX_PENDING, metavar='N', help=f'Documents that may wait for the background writer while the next ones render; 0 saves each one before rendering the next (default: {MAX_PENDING})')
+    parser.add_argument('--font-map', metavar='PATH', help='CSV pinning advisors\' invoice fonts (Advisor,Font); read before the run and updated with every advisor\'s font after it')
+    parser.add_argument('--resume', action='store_true', help=f'Continue an interrupted run: skip the documents it finished, as recorded in {JOURNAL_FILE}')
+    parser.add_argument('--keep-going', action='store_true', help='Skip advisors whose documents cannot be generated instead of stopping, and list them in the failure report')
+    parser.add_argument('--failures', default=FAILURES_FILE, metavar='PATH', help=f'CSV the failure report is written to with --keep-going (default: {FAILURES_FILE})')
+    args = parser.parse_args()
+
+    # Years each entity has a register for; a year only one entity has is skipped for the other
+    plan = {}
+    for entity in args.entity:
+        available = ENTITIES[entity]['sheets']
+        plan[entity] = [year for year in (args.years or available) if year in available]
+    unknown = [year for year in args.years or [] if not any(year in years for years in plan.values())]
+    if unknown:
+        parser.error(f"no register for {', '.join(unknown)}")
+    if args.bundle and args.resume:
+        parser.error('--resume needs the loose document files; it cannot be combined with --bundle')
+
+    profiler = RenderProfiler(args.profile_advisor, args.profile_year,
+                              enabled=bool(args.profile_advisor or args.profile_year))
+    report = RunReport('batch', enabled=args.report is not None)
+    if args.font_map:
+        ADVISOR_FONTS.load(args.font_map)
+    totals = {'invoices': 0, 'letters': 0}
+    failures = FailureReport() if args.keep_going else None
+    # Progress is journaled on every loose-file run, so any of them can be resumed
+    journal = None if args.bundle else ProgressJournal(JOURNAL_FILE, {'amount_grouping': args.amount_grouping}, resume=args.resume)
+
+    # Loose files are written in the background; bundles stream into their archive
+    writer = DocumentWriter(args.write_queue) if args.write_queue > 0 and not args.bundle else None
+
+    with writer or contextlib.nullcontext():
+        for entity, years in plan.items():
+            if not years:
+                print(f"\nNo {entity} register for {', '.join(args.years)}, skipping")
+                continue
+
+            print(f"\n=== {entity}: {', '.join(years)} ===")
+            with report.stage('load'):
+                inputs = EntityData(entity, years, lenient=args.keep_going)
+            entity_failures = failures.for_entity(entity) if failures is not None else None
+
+            entity_bundle = DocumentBundle(f"{entity}.zip") if args.bundle == 'entity' else contextlib.nullcontext()
+            with entity_bundle as entity_bundle:
+                for year in years:
+                    year_bundle = DocumentBundle(f"{entity}_{year}.zip") if args.bundle == 'year' else contextlib.nullcontext(entity_bundle)
+                    with year_bundle as bundle:
+                        if args.outputs in ('invoices', 'both'):
+                            totals['invoices'] += len(run_invoices(inputs, year, args.workers, report, bundle, args.amount_grouping,
+                                                                   profiler, writer, entity_failures, journal))
+                        if args.outputs in ('loes', 'both'):
+                            letter_years = inputs.config['letters'].LETTER_YEARS
+                            if year in letter_years:
+                                totals['letters'] += len(run_letters(inputs, year, report, bundle, profiler, writer, entity_failures,
+                                                                     journal))
+                            else:
+                                print(f"No {entity} engagement letters for {year}: the letter terms are for {', '.join(letter_years)}")
+    if writer is not None:
+        report.add_time('write', writer.write_seconds)
+        report.count('written', writer.written)
+        if writer.written != totals['invoices'] + totals['letters']:
+            raise RuntimeError(f"Generated {totals['invoices'] + totals['letters']} documents but wrote {writer.written}")
+
+    if args.font_map:
+        ADVISOR_FONTS.save(args.font_map)
+    if journal is not None:
+        if failures:
+            # Kept, so --resume retries only the documents that failed
+            journal.close()
+        else:
+            journal.finish()
+
+    print(f"\nGenerated {totals['invoices']} invoices and {totals['letters']} engagement letters")
+    if args.report:
+        report.save(args.report)
+    if failures is not None:
+        failures.print_summary()
+        failures.save(args.failures)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+End-to-end benchmarks for the invoice, engagement letter and TDS scripts.
+
+Synthetic inputs are generated from the sample files in this folder at 10x,
+100x and 1000x their size: every copy of a register row gets its names
+suffixed and its PAN renumbered, so each copy adds new advisors and team
+members with the same column layout as the real registers. Workspaces are
+kept in benchmark_data/ and reused between runs.
+
+Each (script, scale) runs in its own process. The invoice scripts are timed
+stage by stage (load, group, resolve, render, save); the LOE and TDS
+scripts are timed end to end. Results, with peak resident memory, are
+appended to benchmark_results.jsonl and compared with the previous result
+for the same script and scale.
+
+Usage:
+    python benchmark.py --scales 10 100 --scripts invoices-ew invoices-dmc
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(REPO_DIR, 'benchmark_data')
+RESULTS_FILE = os.path.join(REPO_DIR, 'benchmark_results.jsonl')
+
+# Bump when the synthetic data changes so old workspaces are regenerated
+DATA_VERSION = 1
+
+EW_REGISTER = 'EW - Details of Professional Fees Paid for last 7 years 1.xlsx'
+EW_SHEETS = ['2017-18', '2018-19', '2019-20', '2020-21', '2021-22', '2023-24']
+EW_COLUMNS = ['Year', 'TRADING ADVISOR', 'PAYEE', 'PAN', 'PROFESSIONAL FEES', 'OUT OF POCKET', 'TOTAL AMOUNT', 'Invoice Date']
+EW_MASTER = 'EW Master 1.csv'
+EW_LOE_MASTER = 'EW Master 1(Master Data).csv'
+
+DMC_REGISTER = 'Payment of Professional Fees 2.xlsx'
+DMC_SHEET = 'REVISED PAYMENTS TO TRADERS'
+DMC_COLUMNS = ['YEAR', 'TRADING ADVISOR', 'TEAM MEMBER', 'PAN', 'PROFESSIONAL FEES', 'OUT OF POCKET', 'TOTAL AMOUNT', 'Invoice Date']
+DMC_MASTER = 'DMC-Master-Data-1.csv'
+
+TDS_FILE = 'DMC - TDS SUM FY 2022-23.csv'
+
+SYNTHETIC_ADDRESS = 'SYNTHETIC HOUSE, BENCHMARK ROAD, MUMBAI - 400001'
+
+SCRIPTS = {
+    'invoices-ew': 'final_script_7',
+    'invoices-dmc': 'new_invoice_script_for_dmc',
+    'loe-ew': 'new_loe',
+    'tds': 'excel_formatting',
+}
+
+
+# Synthetic data
+
+def copy_suffix(copy):
+    """' Q' plus a base-26 letter code for copies after the first, '' for the first."""
+    if copy == 0:
+        return ''
+    letters = ''
+    while copy:
+        copy, digit = divmod(copy, 26)
+        letters = chr(ord('A') + digit) + letters
+    return ' Q' + letters
+
+
+def copy_pan(pan, copy):
+    """Renumber the digits of a PAN so every copy gets its own."""
+    if not isinstance(pan, str) or len(pan) != 10 or not pan[5:9].isdigit():
+        return pan
+    return f"{pan[:5]}{(int(pan[5:9]) + copy) % 10000:04d}{pan[9]}"
+
+
+def scale_frame(df, scale, name_columns=(), pan_columns=()):
+    # Blank rows (sheet padding below the data) are not copied
+    df = df.dropna(how='all')
+    copies = []
+    for copy in range(scale):
+        part = df.copy()
+        suffix = copy_suffix(copy)
+        for column in name_columns:
+            part[column] = [f"{name.rstrip()}{suffix}" if isinstance(name, str) else name for name in part[column]]
+        for column in pan_columns:
+            part[column] = [copy_pan(pan, copy) for pan in part[column]]
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def add_missing_masters(master, names, name_column, pan_column, address_column):
+    """Master rows for register advisors the master file doesn't list, so lookups never miss."""
+    known = set(master[name_column].dropna().astype(str).str.strip())
+    missing = sorted({name.strip() for name in names if isinstance(name, str)} - known)
+    extra = pd.DataFrame({name_column: missing, pan_column: 'ZZZZZ0000Z', address_column: SYNTHETIC_ADDRESS})
+    return pd.concat([master, extra], ignore_index=True)
+
+
+def make_workspace(scale):
+    """Create (or reuse) a folder of synthetic inputs named like the real ones."""
+    workspace = os.path.join(DATA_DIR, f"x{scale}")
+    marker = os.path.join(workspace, '.complete')
+    if os.path.exists(marker) and open(marker).read() == str(DATA_VERSION):
+        return workspace
+    os.makedirs(workspace, exist_ok=True)
+
+    def sample(name):
+        return os.path.join(REPO_DIR, name)
+
+    ew_sheets = pd.read_excel(sample(EW_REGISTER), sheet_name=EW_SHEETS)
+    ew_scaled = {}
+    with pd.ExcelWriter(os.path.join(workspace, EW_REGISTER)) as writer:
+        for sheet in EW_SHEETS:
+            ew_scaled[sheet] = scale_frame(ew_sheets[sheet][EW_COLUMNS], scale, ['TRADING ADVISOR', 'PAYEE'], ['PAN'])
+            ew_scaled[sheet].to_excel(writer, sheet_name=sheet, index=False)
+
+    dmc = pd.read_excel(sample(DMC_REGISTER), sheet_name=DMC_SHEET)
+    dmc_scaled = scale_frame(dmc[DMC_COLUMNS], scale, ['TRADING ADVISOR', 'TEAM MEMBER'], ['PAN'])
+    with pd.ExcelWriter(os.path.join(workspace, DMC_REGISTER)) as writer:
+        dmc_scaled.to_excel(writer, sheet_name=DMC_SHEET, index=False)
+
+    ew_master = scale_frame(pd.read_csv(sample(EW_MASTER)), scale, ['TRADING ADVISOR', 'TRADING ADVISOR - CHANGED'], ['PAN'])
+    ew_master.to_csv(os.path.join(workspace, EW_MASTER), index=False)
+
+    ew_advisors = pd.concat([ew_scaled[sheet]['TRADING ADVISOR'] for sheet in EW_SHEETS])
+    loe_master = scale_frame(pd.read_csv(sample(EW_LOE_MASTER)), scale, ['Name'], ['PAN'])
+    loe_master = add_missing_masters(loe_master, ew_advisors, 'Name', 'PAN', 'Address')
+    loe_master.to_csv(os.path.join(workspace, EW_LOE_MASTER), index=False)
+
+    dmc_master = scale_frame(pd.read_csv(sample(DMC_MASTER)), scale, ['NAME'], ['PAN'])
+    dmc_master = add_missing_masters(dmc_master, dmc_scaled['TRADING ADVISOR'], 'NAME', 'PAN', 'Address')
+    dmc_master.to_csv(os.path.join(workspace, DMC_MASTER), index=False)
+
+    scale_frame(pd.read_csv(sample(TDS_FILE)), scale).to_csv(os.path.join(workspace, TDS_FILE), index=False)
+
+    with open(marker, 'w') as f:
+        f.write(str(DATA_VERSION))
+    return workspace
+
+
+# Measurement
+
+def peak_rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+        self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def bench_invoices(script, limit=None):
+    """Run one invoice script stage by stage in this process (cwd is the workspace)."""
+    import input_cache
+    import schemas
+    import workbook_loader
+    from amounts import add_amount_texts
+    from docx_output import document_bytes
+    from name_index import AddressIndex, NamePanIndex
+
+    input_cache.CACHE_DIR = os.path.join(os.getcwd(), '.input_cache')
+    module = importlib.import_module(SCRIPTS[script])
+    timer = StageTimer()
+    counts = {'rows': 0, 'advisors': 0, 'documents': 0}
+
+    # Through the schemas the script itself loads with, so the columns read and converted are the same
+    if script == 'invoices-ew':
+        register_schema, master_schema, register_sheets = schemas.EW_REGISTER, schemas.EW_INVOICE_MASTER, module.sheet_names
+    else:
+        register_schema, master_schema, register_sheets = schemas.DMC_REGISTER, schemas.DMC_MASTER, [DMC_SHEET]
+
+    with timer.stage('load'):
+        workbook_loader.USE_INPUT_CACHE = False
+        address_data = workbook_loader.load_csv(module.address_file_path, master_schema)
+        sheets = workbook_loader.load_sheets(module.file_path, register_sheets, register_schema)
+        if script == 'invoices-ew':
+            address_index = AddressIndex(address_data, 'TRADING ADVISOR', 'ADDRESS')
+        else:
+            # The DMC script names the year after its sheet list, not the sheet it reads
+            sheets = {module.sheet_names[0]: sheets[DMC_SHEET]}
+            address_index = AddressIndex(address_data, 'NAME', 'Address')
+
+    # Same inputs again through the on-disk cache
+    workbook_loader.USE_INPUT_CACHE = True
+    workbook_loader._loaded_workbooks.clear()
+    workbook_loader._loaded_csvs.clear()
+    workbook_loader.load_sheets(module.file_path, register_sheets, register_schema)
+    workbook_loader._loaded_workbooks.clear()
+    with timer.stage('load_cached'):
+        workbook_loader.load_sheets(module.file_path, register_sheets, register_schema)
+
+    for sheet, data in sheets.items():
+        year_folder = sheet.replace('/', '-')
+        counts['rows'] += len(data)
+
+        with timer.stage('amounts'):
+            data = add_amount_texts(data, module.AMOUNT_GROUPING)
+        with timer.stage('group'):
+            groups = list(data.groupby('TRADING ADVISOR', observed=True))[:limit]
+
+        with timer.stage('resolve'):
+            if script == 'invoices-ew':
+                jobs = [module.prepare_advisor_invoices(group, address_index, year_folder, advisor)
+                        for advisor, group in groups]
+            else:
+                pan_index = NamePanIndex(data)
+                jobs = [module.prepare_advisor_invoices(group, address_index, year_folder, advisor, pan_index)
+                        for advisor, group in groups]
+        counts['advisors'] += len(jobs)
+
+        for job in jobs:
+            with timer.stage('render'):
+                doc = module.build_advisor_document(job)
+            with timer.stage('save'):
+                file_name = module.invoice_file_name(job[2], job[3])
+                os.makedirs(os.path.dirname(file_name), exist_ok=True)
+                with open(file_name, 'wb') as f:
+                    f.write(document_bytes(doc))
+            counts['documents'] += 1
+
+    return timer.stages, counts
+
+
+def bench_script(script):
+    """Run a whole script in a child process, timed end to end."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, f"{SCRIPTS[script]}.py")],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               env=dict(os.environ, PYTHONPATH=REPO_DIR))
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    stderr = process.stderr.read().decode('utf-8', 'replace')
+    process.stderr.close()
+    if status != 0:
+        raise RuntimeError(f"{script} failed:\n{stderr}")
+    return {'total': elapsed}, {}, peak_rss_mb(usage)
+
+
+def run_one(script, scale, limit):
+    """Entry point of a benchmark child process; prints one JSON result."""
+    workspace = make_workspace(scale)
+    os.chdir(workspace)
+    sys.path.insert(0, REPO_DIR)
+
+    if script.startswith('invoices'):
+        stages, counts = bench_invoices(script, limit)
+        peak = peak_rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+    else:
+        stages, counts, peak = bench_script(script)
+
+    print(json.dumps({
+        'script': script,
+        'scale': scale,
+        'stages': {name: round(seconds, 4) for name, seconds in stages.items()},
+        'counts': counts,
+        'peak_rss_mb': peak,
+        'advisor_limit': limit,
+    }))
+
+
+# Results
+
+def code_version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def previous_result(script, scale, limit):
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    previous = None
+    with open(RESULTS_FILE, encoding='utf-8') as f:
+        for line in f:
+            result = json.loads(line)
+            if (result['script'], result['scale'], result.get('advisor_limit')) == (script, scale, limit):
+                previous = result
+    return previous
+
+
+def print_result(result, previous):
+    print(f"\n{result['script']} x{result['scale']}  (peak RSS {result['peak_rss_mb']} MB, {result['counts']})")
+    for name, seconds in result['stages'].items():
+        line = f"  {name:<12} {seconds:>10.3f} s"
+        if previous and name in previous['stages'] and previous['stages'][name] > 0:
+            change = (seconds - previous['stages'][name]) / previous['stages'][name] * 100
+            line += f"   {change:+.1f}% vs {previous['version']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the generators on synthetic fee registers.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000], help='Multiples of the sample data (default: 10 100 1000)')
+    parser.add_argument('--scripts', nargs='+', choices=sorted(SCRIPTS), default=sorted(SCRIPTS), help='Scripts to benchmark (default: all)')
+    parser.add_argument('--limit-advisors', type=int, default=None, help='Render at most this many advisors per year')
+    parser.add_argument('--no-save', action='store_true', help=f'Print results without appending them to {os.path.basename(RESULTS_FILE)}')
+    parser.add_argument('--child', nargs=2, metavar=('SCRIPT', 'SCALE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_one(args.child[0], int(args.child[1]), args.limit_advisors)
+        return
+
+    version = code_version()
+    for scale in args.scales:
+        print(f"Preparing synthetic inputs at {scale}x ...")
+        make_workspace(scale)
+        for script in args.scripts:
+            command = [sys.executable, os.path.abspath(__file__), '--child', script, str(scale)]
+            if args.limit_advisors is not None:
+                command += ['--limit-advisors', str(args.limit_advisors)]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"\n{script} x{scale} failed:\n{completed.stderr}")
+                continue
+
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            result.update({
+                'version': version,
+                'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+            })
+            print_result(result, previous_result(script, scale, args.limit_advisors))
+
+            if not args.no_save:
+                with open(RESULTS_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
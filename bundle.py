@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import zipfile
+from docx_output import ZIP_DATE_TIME
+
+
+class DocumentBundle:
+    """
+    A ZIP archive that generated documents are streamed into, in place of
+    one loose .docx file each, closed off with an index.json listing them.
+
+    Documents go into the archive straight from memory under the path they
+    would have been saved to, so extracting the bundle gives the usual
+    folder layout. A .docx is already compressed, so it is stored as-is.
+
+    Parameters:
+    - path (str): The archive to create.
+    """
+
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.entries = []
+        self._names = set()
+        self._zip = zipfile.ZipFile(path, 'w')
+
+    def add(self, file_name, data, **details):
+        """
+        Write one document to the archive.
+
+        Parameters:
+        - file_name (str): Where the document would have been saved, e.g.
+          '2023-24/Combined_Invoice_X.docx'; used as its path in the archive.
+        - data (bytes): The .docx contents.
+        - details: Extra index fields, e.g. kind='invoice', year='2023-24'.
+        """
+        name = file_name.replace(os.sep, '/')
+        if name in self._names:
+            raise ValueError(f"{name} is already in {self.path}")
+        self._names.add(name)
+
+        info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_STORED
+        self._zip.writestr(info, data)
+        self.entries.append(dict(file=name, bytes=len(data), sha256=hashlib.sha256(data).hexdigest(), **details))
+
+    def close(self):
+        """Write the index and finish the archive."""
+        info = zipfile.ZipInfo(self.INDEX_NAME, date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._zip.writestr(info, json.dumps({'documents': self.entries}, indent=2))
+        self._zip.close()
+        print(f"Bundle saved: {self.path} ({len(self.entries)} documents)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave no half-written archive behind
+            self._zip.close()
+            os.remove(self.path)
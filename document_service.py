@@ -0,0 +1,157 @@
+"""
+Render single invoices and engagement letters on request, as .docx bytes.
+
+DocumentService loads the registers and master data once and renders one
+advisor's document for one year in memory; nothing is written to disk.
+Recently rendered documents are kept in an LRU cache.
+
+Run as a script it serves them over HTTP on localhost:
+    GET /invoice/<entity>/<year>/<advisor>   consolidated invoice (.docx)
+    GET /letter/<entity>/<year>/<advisor>    engagement letter (.docx)
+    GET /advisors/<entity>/<year>            advisors with documents (JSON)
+
+Usage:
+    python document_service.py --port 8000
+    curl -o invoice.docx "http://127.0.0.1:8000/invoice/EW/2023-24/ARUN%20RAJENDRA%20MAURYA"
+"""
+import argparse
+import json
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from batch import ENTITIES, EntityData
+
+# Rendered documents kept in memory
+CACHE_SIZE = 256
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+KINDS = ['invoice', 'letter']
+
+
+class DocumentService:
+    """
+    Renders one advisor's invoice or engagement letter for one year to
+    .docx bytes, from inputs loaded once when the service starts.
+
+    Parameters:
+    - entities (list): Entities to load. Default is all of them.
+    - cache_size (int): Rendered documents kept in the LRU cache.
+    """
+
+    def __init__(self, entities=None, cache_size=CACHE_SIZE):
+        self.inputs = {entity: EntityData(entity, list(ENTITIES[entity]['sheets']))
+                       for entity in entities or sorted(ENTITIES)}
+        # The letter generators reuse one base document, so render one document at a time
+        self._lock = threading.Lock()
+        self._render_cached = lru_cache(maxsize=cache_size)(self._render)
+
+    def _year_inputs(self, entity, year):
+        inputs = self.inputs.get(entity)
+        if inputs is None or year not in inputs.years:
+            raise KeyError(f"No {entity} register for {year}")
+        return inputs
+
+    def advisors(self, entity, year):
+        """Advisors with documents for the year, sorted."""
+        return sorted(self._year_inputs(entity, year).advisor_groups(year))
+
+    def document(self, kind, entity, year, advisor):
+        """
+        The rendered document, from the cache when it was rendered recently.
+
+        Parameters:
+        - kind (str): 'invoice' or 'letter'.
+        - entity (str): 'EW' or 'DMC'.
+        - year (str): e.g. '2023-24'.
+        - advisor (str): The trading advisor as written in the register.
+
+        Returns:
+        - bytes: The .docx file.
+
+        Raises:
+        - KeyError: Unknown kind, entity or year, no rows for the advisor, or a
+          letter for a year its generator has no terms for.
+        """
+        with self._lock:
+            return self._render_cached(kind, entity, year, advisor.strip())
+
+    def cache_info(self):
+        return self._render_cached.cache_info()
+
+    def _render(self, kind, entity, year, advisor):
+        if kind not in KINDS:
+            raise KeyError(f"Unknown document kind {kind}")
+        inputs = self._year_inputs(entity, year)
+        group = inputs.advisor_groups(year).get(advisor)
+        if group is None:
+            raise KeyError(f"No {entity} {year} rows for {advisor}")
+
+        if kind == 'letter':
+            if year not in inputs.config['letters'].LETTER_YEARS:
+                raise KeyError(f"No {entity} engagement letter terms for {year}")
+            return inputs.config['letters'].engagement_letter_bytes(advisor, inputs.letter_directory, year,
+                                                                    inputs.team_roster(year))
+        generator = inputs.config['invoices']
+        if entity == 'DMC':
+            return generator.consolidated_invoice_bytes(group, inputs.address_index, year, advisor,
+                                                        inputs.pan_index(year))
+        return generator.consolidated_invoice_bytes(group, inputs.address_index, year, advisor)
+
+
+class DocumentRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end for a DocumentService, set as the class attribute service."""
+
+    service = None
+
+    def do_GET(self):
+        parts = [unquote(part) for part in self.path.split('?')[0].strip('/').split('/')]
+        try:
+            if len(parts) == 3 and parts[0] == 'advisors':
+                body = json.dumps(self.service.advisors(parts[1], parts[2])).encode('utf-8')
+                self._send(200, 'application/json', body)
+            elif len(parts) == 4 and parts[0] in KINDS:
+                kind, entity, year, advisor = parts
+                body = self.service.document(kind, entity, year, advisor)
+                file_name = f"{kind}_{entity}_{year}_{advisor.strip().replace(' ', '_')}.docx"
+                self._send(200, DOCX_CONTENT_TYPE, body, {'Content-Disposition': f'attachment; filename="{file_name}"'})
+            else:
+                self._send(404, 'text/plain', b'Use /invoice|letter/<entity>/<year>/<advisor> or /advisors/<entity>/<year>\n')
+        except KeyError as e:
+            self._send(404, 'text/plain', f"{e.args[0]}\n".encode('utf-8'))
+        except Exception as e:
+            self._send(500, 'text/plain', f"Could not render {self.path}: {e}\n".encode('utf-8'))
+
+    def _send(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve invoices and engagement letters rendered on request.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--entity', nargs='+', choices=sorted(ENTITIES), help='Entities to serve (default: all)')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help=f'Rendered documents kept in memory (default: {CACHE_SIZE})')
+    args = parser.parse_args()
+
+    DocumentRequestHandler.service = DocumentService(args.entity, args.cache_size)
+    server = ThreadingHTTPServer((args.host, args.port), DocumentRequestHandler)
+    print(f"Serving documents on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
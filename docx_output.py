@@ -0,0 +1,53 @@
+import io
+import os
+import zipfile
+
+# Fixed timestamp written on every archive member, so saving the same
+# document twice (or from different processes) gives identical bytes
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def document_bytes(doc):
+    """
+    Serialize a python-docx Document to .docx bytes.
+
+    python-docx stamps each zip member with the current time; the members
+    are rewritten here with ZIP_DATE_TIME so the output depends only on the
+    document contents.
+    """
+    raw = io.BytesIO()
+    doc.save(raw)
+    raw.seek(0)
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(raw) as src, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            member = zipfile.ZipInfo(info.filename, date_time=ZIP_DATE_TIME)
+            member.compress_type = zipfile.ZIP_DEFLATED
+            member.external_attr = info.external_attr
+            dst.writestr(member, src.read(info.filename))
+    return out.getvalue()
+
+
+def write_bytes(data, file_name):
+    """
+    Write serialized document bytes to file_name, creating its folder.
+
+    The bytes go to <file_name>.tmp first, which is then renamed over
+    file_name, so an interrupted write never leaves a half-written document
+    under the real name.
+    """
+    folder = os.path.dirname(file_name)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{file_name}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_name)
+
+
+def save_document(doc, file_name):
+    """Save a Document to file_name with reproducible bytes."""
+    write_bytes(document_bytes(doc), file_name)
@@ -1,18 +1,20 @@
+import argparse
 import pandas as pd
 import re
 
 
-df = pd.read_csv("DMC - TDS SUM FY 2022-23.csv")
+# Define a regex pattern for PAN (5 letters, 4 digits, and 1 letter)
+PAN_PATTERN = r"([A-Z]{5}[0-9]{4}[A-Z])"
+
+# Party name split around the first PAN: name, PAN, address
+PARTY_NAME_PATTERN = r"^(.*?)" + PAN_PATTERN + r"(.*)$"
 
-# Define a function to extract Name, PAN, and Address
 # Define a function to extract Name, PAN, and Address
 def extract_details(party_name):
     if not isinstance(party_name, str):  # Check if party_name is not a string
         return pd.Series([None, None, None])  # Return None values if it's not a string
-    
-    # Define a regex pattern for PAN (5 letters, 4 digits, and 1 letter)
-    pan_pattern = r"([A-Z]{5}[0-9]{4}[A-Z])"
-    match = re.search(pan_pattern, party_name)
+
+    match = re.search(PAN_PATTERN, party_name)
 
     if match:
         # Extract Name, PAN, and Address
@@ -23,14 +25,69 @@ def extract_details(party_name):
     else:
         return pd.Series([None, None, None])
 
-# Apply the function to each row in the DataFrame's 'Party Name' column
-df[['Name', 'PAN', 'Address']] = df['Party Name'].apply(extract_details)
+def extract_details_columns(party_names):
+    """
+    Vectorized extract_details: split a whole 'Party Name' column into
+    Name, PAN and Address with a single Series.str.extract call.
+
+    Parameters:
+    - party_names (Series): The 'Party Name' column.
+
+    Returns:
+    - DataFrame: Name, PAN and Address columns, missing where no PAN was found.
+    """
+    # object dtype so non-string cells come back as missing instead of raising
+    details = party_names.astype(object).str.extract(PARTY_NAME_PATTERN, flags=re.DOTALL)
+    details.columns = ['Name', 'PAN', 'Address']
+    details['Name'] = details['Name'].str.strip()
+    details['Address'] = details['Address'].str.strip()
+    return details
+
+def format_tds_details(df):
+    df[['Name', 'PAN', 'Address']] = extract_details_columns(df['Party Name'])
+
+    # Drop rows where 'Name', 'PAN', or 'Address' could not be extracted (optional)
+    return df.dropna(subset=['Name', 'PAN', 'Address'])
+
+def format_tds_file(input_path, output_path, chunksize=None):
+    """
+    Extract Name, PAN and Address from a TDS export and write them to a CSV.
+
+    Parameters:
+    - input_path (str): The TDS export CSV.
+    - output_path (str): Where to write the extracted details.
+    - chunksize (int): Rows read at a time. Default is None (whole file at once);
+      set it for multi-year dumps that should not be loaded in full.
+
+    Returns:
+    - int: Number of rows written.
+    """
+    if chunksize is None:
+        df = format_tds_details(pd.read_csv(input_path))
+
+        # Display the result
+        print(df[['Name', 'PAN', 'Address']])
+
+        df.to_csv(output_path, index=False)
+        return len(df)
+
+    rows_written = 0
+    for chunk_number, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+        chunk = format_tds_details(chunk)
+        chunk.to_csv(output_path, index=False, mode='w' if chunk_number == 0 else 'a', header=(chunk_number == 0))
+        rows_written += len(chunk)
+
+    print(f"Extracted {rows_written} rows to {output_path}")
+    return rows_written
 
-# Drop rows where 'Name', 'PAN', or 'Address' could not be extracted (optional)
-df = df.dropna(subset=['Name', 'PAN', 'Address'])
+def main():
+    parser = argparse.ArgumentParser(description='Split TDS party names into Name, PAN and Address.')
+    parser.add_argument('--input', default="DMC - TDS SUM FY 2022-23.csv", help='TDS export to read')
+    parser.add_argument('--output', default="extracted_details.csv", help='CSV to write')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream the input this many rows at a time')
+    args = parser.parse_args()
 
-# Display the result
-print(df[['Name', 'PAN', 'Address']])
+    format_tds_file(args.input, args.output, args.chunksize)
 
-# Save the modified DataFrame to a new CSV if needed
-df.to_csv("extracted_details.csv", index=False)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Keep a run going past advisors whose documents cannot be generated.
+
+Every register is checked up front, so the known problems (an amount or
+date that could not be read, an invoiced row with no amount, an advisor
+missing from the master data or with no address there) are found before
+anything is rendered. Registers are loaded through a lenient schema for
+this, so a malformed cell is noted rather than stopping the load. Advisors with a
+problem are left out and recorded in a FailureReport; so is any advisor
+whose document raises while it is being rendered. Everything else is
+generated as usual, and the report lists what is left to fix.
+"""
+import pandas as pd
+
+from aliases import ALIAS_FILE
+from amounts import AMOUNT_COLUMNS
+from schemas import INVALID_CELLS
+
+# Where --keep-going runs write the failure report
+FAILURES_FILE = 'failures.csv'
+
+COLUMNS = ['entity', 'kind', 'year', 'advisor', 'stage', 'error']
+
+
+def error_text(error):
+    """One line describing an exception, e.g. "KeyError: 'PAN'"."""
+    return f"{type(error).__name__}: {error}"
+
+
+def invoice_problems(data, advisor_column='TRADING ADVISOR', date_column='Invoice Date'):
+    """
+    Find the advisors whose invoices cannot be rendered, over the whole
+    register at once.
+
+    Parameters:
+    - data (DataFrame): The payment register for a year; loaded through a
+      lenient schema, its INVALID_CELLS are reported too.
+    - advisor_column (str): Column the invoices are grouped by.
+    - date_column (str): Column the invoice pages are grouped by.
+
+    Returns:
+    - dict: Advisor (as in the register) -> what is wrong with their rows.
+    """
+    problems = {}
+    unreadable = pd.Series(False, index=data.index)
+    if INVALID_CELLS in data:
+        # Any of the advisor's rows, invoiced or not: an unreadable date leaves the row undated
+        unreadable = data[advisor_column].notna() & data[INVALID_CELLS].notna()
+        cells = data.loc[unreadable].groupby(advisor_column, observed=True, sort=False)[INVALID_CELLS]
+        problems = {advisor: f"unreadable {text}" for advisor, text in cells.agg('; '.join).items()}
+
+    invoiced = data[[advisor_column, date_column]].notna().all(axis=1) & ~unreadable
+    rows = data[invoiced]
+    missing = rows[AMOUNT_COLUMNS].isna()
+    bad = missing.any(axis=1)
+    if not bad.any():
+        return problems
+
+    # Missing amounts per advisor and column
+    counts = missing[bad].groupby(rows.loc[bad, advisor_column], observed=True, sort=False).sum()
+    for advisor, row in counts.iterrows():
+        text = '; '.join(f"{column} missing in {n} row(s)" for column, n in row.items() if n)
+        problems[advisor] = f"{problems[advisor]}; {text}" if advisor in problems else text
+    return problems
+
+
+def letter_problems(advisors, directory):
+    """
+    Resolve every advisor's master data entry and find those whose
+    engagement letters cannot be rendered.
+
+    Parameters:
+    - advisors (list): Advisors as written in the register.
+    - directory (AdvisorDirectory): The master data.
+
+    Returns:
+    - tuple: ({advisor: (name, address, PAN)} for those that can be
+      rendered, {advisor: what is wrong})
+    """
+    resolved, missing = directory.resolve_all(advisors)
+    problems = {advisor: f"not in the master data or {ALIAS_FILE}; closest: {directory.closest(advisor)}"
+                for advisor in missing}
+    for advisor, (name, address, _) in list(resolved.items()):
+        if not isinstance(address, str) or not address.strip():
+            problems[advisor] = f"no address for {name} in the master data"
+            del resolved[advisor]
+    return resolved, problems
+
+
+def report_problems(problems, kind, year, failures=None):
+    """
+    Record the advisors left out by a check in failures, or print them
+    when no FailureReport is kept.
+    """
+    if failures is not None:
+        for advisor, problem in problems.items():
+            failures.add(kind, year, advisor.strip(), 'validate', problem)
+        return
+    if problems:
+        print(f"\n{len(problems)} advisor(s) skipped, no {kind} for {year}:")
+        for advisor, problem in problems.items():
+            print(f"  {advisor.strip()}: {problem}")
+
+
+class Isolated:
+    """
+    Wraps a render function so that an advisor whose document raises does
+    not stop the others: calling it returns (func(job), None), or
+    (None, error text) when func raised. An OSError, e.g. a full disk, is
+    not the advisor's and is still raised. Picklable whenever func is, so
+    it can be handed to map_jobs with a process pool.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, job):
+        try:
+            return self.func(job), None
+        except OSError:
+            raise
+        except Exception as e:
+            return None, error_text(e)
+
+
+class FailureReport:
+    """
+    The documents a run could not generate and why, one row each:
+    entity, kind ('invoice' or 'letter'), year, advisor, stage and error.
+
+    Stages: validate (left out by the up-front checks) and render (raised
+    while the document was built or serialized).
+
+    Parameters:
+    - entity (str): Entity recorded with each failure, e.g. 'EW'.
+    - rows (list): Failure rows shared with another report; see for_entity.
+    """
+
+    def __init__(self, entity=None, rows=None):
+        self.entity = entity
+        self.rows = [] if rows is None else rows
+
+    def for_entity(self, entity):
+        """A report recording entity with each failure, that adds to this one."""
+        return FailureReport(entity, self.rows)
+
+    def add(self, kind, year, advisor, stage, error):
+        """Record one document that was not generated; error is text or an exception."""
+        if isinstance(error, BaseException):
+            error = error_text(error)
+        self.rows.append((self.entity, kind, year, advisor, stage, error))
+        print(f"Not generated: {kind} for {advisor} ({year}), {stage} failed: {error}")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_frame(self):
+        return pd.DataFrame(self.rows, columns=COLUMNS)
+
+    def print_summary(self):
+        if not self.rows:
+            return
+        print(f"\n{len(self.rows)} document(s) not generated:")
+        print(self.to_frame().to_string(index=False))
+
+    def save(self, path):
+        """Write the failures to a CSV file."""
+        self.to_frame().to_csv(path, index=False)
+        print(f"Failure report saved: {path}")
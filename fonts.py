@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from aliases import name_key
+
+# Fonts an advisor's invoices are set in
+FONT_LIST = ['Calibri', 'Arial', 'Aptos Display', 'Cambria']
+
+# Mixed into the hash; change it to give every advisor a new font
+FONT_SEED = 'advisor-fonts-1'
+
+FONT_MAP_COLUMNS = ['Advisor', 'Font']
+
+
+def hashed_font(advisor, fonts=FONT_LIST, seed=FONT_SEED):
+    """
+    The font for an advisor, from a hash of the seed and the name
+    (ignoring case and extra spaces): the same on every run and in every
+    process, unlike random.choice or Python's hash().
+    """
+    digest = hashlib.sha256(f"{seed}\0{name_key(advisor)}".encode('utf-8')).digest()
+    return fonts[int.from_bytes(digest[:8], 'big') % len(fonts)]
+
+
+class FontAssigner:
+    """
+    Advisor -> font, worked out once per advisor.
+
+    Fonts pinned in a font map file win; every other advisor gets
+    hashed_font(). Saving the map pins the fonts of every advisor seen, so
+    they keep their fonts even if FONT_LIST or FONT_SEED later change.
+
+    The map is a CSV with one row per advisor:
+        Advisor,Font
+        MITESH DOSHI,Cambria
+
+    Parameters:
+    - fonts (list): Fonts to choose from.
+    - seed (str): Mixed into the hash.
+    """
+
+    def __init__(self, fonts=FONT_LIST, seed=FONT_SEED):
+        self.fonts = fonts
+        self.seed = seed
+        self.assigned = {}       # name_key -> font
+
+    def font(self, advisor):
+        key = name_key(advisor)
+        if key not in self.assigned:
+            self.assigned[key] = hashed_font(advisor, self.fonts, self.seed)
+        return self.assigned[key]
+
+    def load(self, path):
+        """Pin the fonts listed in a font map file, if it exists."""
+        if not os.path.exists(path):
+            return
+        pinned = pd.read_csv(path, dtype=str).dropna(subset=FONT_MAP_COLUMNS)
+        for advisor, font in zip(pinned['Advisor'], pinned['Font']):
+            self.assigned[name_key(advisor)] = font.strip()
+
+    def save(self, path):
+        """Write every font assigned so far to a font map file, sorted by advisor."""
+        rows = sorted(self.assigned.items())
+        pd.DataFrame(rows, columns=FONT_MAP_COLUMNS).to_csv(path, index=False)
+
+
+# Shared by the invoice generators, so a font map loaded once applies to all of them
+ADVISOR_FONTS = FontAssigner()
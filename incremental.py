@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+
+def group_digest(rows, *values):
+    """
+    SHA-256 over a group's rows (column names and cell values, in order)
+    plus any extra values such as the resolved address and PAN.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, rows.columns))).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    for value in values:
+        digest.update(b'\0' + str(value).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Content hashes of the inputs behind every generated document, so a rerun
+    can skip the documents whose inputs have not changed.
+
+    Parameters:
+    - path (str): JSON file the manifest is kept in.
+    - version (int): Bump to invalidate every entry, e.g. after a layout change.
+    """
+
+    def __init__(self, path, version=1):
+        self.path = path
+        self.version = version
+        self.entries = {}
+        self._pending = {}
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == version:
+                self.entries = saved.get('entries', {})
+
+    def is_current(self, key, digest, file_name):
+        """
+        True when file_name exists and was last built from inputs with this
+        digest. Otherwise the digest is held until mark_built(file_name).
+        """
+        entry = self.entries.get(key)
+        if entry and entry['digest'] == digest and entry['file'] == file_name and os.path.exists(file_name):
+            return True
+        self._pending[file_name] = (key, digest)
+        return False
+
+    def mark_built(self, file_name):
+        """Record that file_name was written from the digest seen by is_current."""
+        key, digest = self._pending.pop(file_name)
+        self.entries[key] = {'digest': digest, 'file': file_name}
+
+    def save(self):
+        """Write the manifest atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
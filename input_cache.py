@@ -0,0 +1,87 @@
+import hashlib
+import os
+import pickle
+import pandas as pd
+
+# Where parsed sheets and master CSVs are kept between runs
+CACHE_DIR = '.input_cache'
+
+# Oldest entries are evicted once the cache grows past this size
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_digests = {}
+
+
+def file_digest(file_path):
+    """
+    SHA-256 of a file's contents, remembered per (path, size, mtime) so a
+    file is hashed at most once per process.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _digests:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        _digests[key] = digest.hexdigest()
+    return _digests[key]
+
+
+def _entry_path(file_path, sheet_name, cache_dir):
+    cache_dir = cache_dir or CACHE_DIR
+    # The pandas version is part of the key so an upgrade never reads stale pickles
+    key = f"{file_digest(file_path)}\0{sheet_name}\0{pd.__version__}"
+    return os.path.join(cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.pkl')
+
+
+def get(file_path, sheet_name=None, cache_dir=None):
+    """
+    Return the cached DataFrame for a sheet (or a whole CSV when sheet_name
+    is None), or None when the file has changed or was never cached.
+    """
+    entry = _entry_path(file_path, sheet_name, cache_dir)
+    try:
+        data = pd.read_pickle(entry)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    os.utime(entry)  # mark as recently used for eviction
+    return data
+
+
+def put(file_path, sheet_name, data, cache_dir=None, max_bytes=None):
+    """Store a parsed DataFrame and evict old entries beyond max_bytes."""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = _entry_path(file_path, sheet_name, cache_dir)
+    tmp_entry = f"{entry}.{os.getpid()}.tmp"
+    data.to_pickle(tmp_entry)
+    os.replace(tmp_entry, entry)
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir=None, max_bytes=None):
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pkl'):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+
+
+def clear(cache_dir=None):
+    """Remove every cached entry."""
+    cache_dir = cache_dir or CACHE_DIR
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
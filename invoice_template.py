@@ -0,0 +1,78 @@
+from copy import deepcopy
+from docx import Document
+from docx.oxml.ns import qn
+
+
+def placeholder(name):
+    """Text marking a variable spot in a template page, e.g. '{{DATE}}'."""
+    return '{{' + name + '}}'
+
+
+class PageTemplate:
+    """
+    A block of document body elements built once through python-docx and
+    then cloned into documents with their placeholders filled in.
+
+    The build function lays the page out in a scratch document, writing
+    placeholder(name) wherever a variable value goes. Each run holding a
+    placeholder is remembered; appending the page deep-copies the skeleton
+    and rewrites only those runs, so the result is the same XML the build
+    function would have produced with the real values.
+
+    Parameters:
+    - build (callable): build(doc) adds the page to doc.
+    - names (list): Placeholder names used by the page.
+    """
+
+    def __init__(self, build, names):
+        scratch = Document()
+        build(scratch)
+
+        self.placeholders = {name: placeholder(name) for name in names}
+        self.elements = [element for element in scratch.element.body if element.tag != qn('w:sectPr')]
+
+        # (element index, run index within element, run text with placeholders)
+        self.slots = []
+        for element_index, element in enumerate(self.elements):
+            for run_index, run in enumerate(element.iter(qn('w:r'))):
+                text = run.text
+                if any(marker in text for marker in self.placeholders.values()):
+                    self.slots.append((element_index, run_index, text))
+
+    def append_to(self, doc, values):
+        """
+        Append a copy of the page to the end of doc.
+
+        Parameters:
+        - doc (Document): The document to add the page to.
+        - values (dict): Placeholder name -> text to put in its place.
+
+        Returns:
+        - list: The appended body elements, in order.
+        """
+        elements = [deepcopy(element) for element in self.elements]
+
+        runs_by_element = {}
+        for element_index, run_index, text in self.slots:
+            if element_index not in runs_by_element:
+                runs_by_element[element_index] = list(elements[element_index].iter(qn('w:r')))
+            for name, marker in self.placeholders.items():
+                if marker in text:
+                    text = text.replace(marker, str(values[name]))
+            runs_by_element[element_index][run_index].text = text
+
+        sect_pr = doc.element.body.sectPr
+        for element in elements:
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
+            else:
+                doc.element.body.append(element)
+        return elements
+
+
+def clear_body(doc):
+    """Remove everything from doc's body except the section properties, so doc can be filled again."""
+    body = doc.element.body
+    for element in list(body):
+        if element.tag != qn('w:sectPr'):
+            body.remove(element)
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+
+
+class ProgressJournal:
+    """
+    The documents a run has finished, recorded as they reach the disk, so
+    an interrupted run can be resumed without generating them again.
+
+    The journal is a JSON-lines file: a header with the run's settings,
+    then one line per finished document: its file name, which identifies
+    it (an invoice and a letter of the same advisor and year are different
+    documents), its year and its advisor. Each line is flushed and fsynced
+    as soon as it is written; a line cut short by a crash is ignored when
+    the journal is read back.
+
+    Parameters:
+    - path (str): The journal file.
+    - settings (dict): What the documents depend on besides the inputs, e.g.
+      the amount grouping. A journal written with other settings is not resumed.
+    - resume (bool): Keep the documents an earlier, interrupted run finished.
+      When False the journal starts empty.
+    """
+
+    def __init__(self, path, settings=None, resume=True):
+        self.path = path
+        self.settings = settings or {}
+        self.done = {}
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self._load()
+
+        # Rewritten without any torn line, then appended to
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'settings': self.settings}) + '\n')
+            for file_name, (year, advisor) in self.done.items():
+                f.write(_line(file_name, year, advisor))
+        os.replace(tmp_path, path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        if not entries or entries[0].get('settings') != self.settings:
+            print(f"{self.path} is from a run with other settings; starting over")
+            return
+        for entry in entries[1:]:
+            self.done[entry['file']] = (entry['year'], entry['advisor'])
+        print(f"Resuming from {self.path}: {len(self.done)} documents already generated")
+
+    def is_done(self, file_name):
+        """Whether the document was finished by the run being resumed and is still on disk."""
+        return file_name in self.done and os.path.exists(file_name)
+
+    def record(self, file_name, year, advisor):
+        """Record a finished document; call once file_name is on disk. Thread-safe."""
+        with self._lock:
+            self.done[file_name] = (year, advisor)
+            self._file.write(_line(file_name, year, advisor))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Close the journal and keep it, so the run can be resumed."""
+        self._file.close()
+
+    def finish(self):
+        """The run completed: remove the journal, so the next run starts afresh."""
+        self._file.close()
+        os.remove(self.path)
+
+
+def _line(file_name, year, advisor):
+    return json.dumps({'file': file_name, 'year': year, 'advisor': advisor}) + '\n'
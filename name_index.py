@@ -0,0 +1,168 @@
+import pandas as pd
+
+
+def normalize_name(name):
+    """
+    Upper-case a name and split it into tokens, the same way the invoice
+    scripts compare TEAM MEMBER / PAYEE names.
+    """
+    return tuple(str(name).upper().split())
+
+
+def _substrings(token):
+    return {token[i:j] for i in range(len(token)) for j in range(i + 1, len(token) + 1)}
+
+
+class NamePanIndex:
+    """
+    Name -> PAN lookup built once per run from a payment register.
+
+    A search name matches a register name when every search token is a
+    substring of some register token, or contains one. The first matching
+    row (in register order) with a non-blank PAN wins, exactly as the old
+    row-by-row scan in get_advisor_pan did.
+
+    Parameters:
+    - data (DataFrame): The payment register.
+    - name_column (str): Column holding the names. Default is 'TEAM MEMBER'.
+    - pan_column (str): Column holding the PANs. Default is 'PAN'.
+    - debug (bool): Print every matching register entry on each lookup. Default is False.
+    """
+
+    def __init__(self, data, name_column='TEAM MEMBER', pan_column='PAN', debug=False):
+        self.debug = debug
+        self.names = []          # normalized token tuple per distinct name
+        self.rows = []           # (position, name, PAN) register rows per distinct name
+        self.first_pan = []      # (row position, PAN) of the first usable PAN, or None
+        self.exact = {}          # 'JOINED NAME' -> distinct name id
+        self.tokens = {}         # token -> ids of names having that token
+        self.substrings = {}     # any substring of a token -> ids of names
+        self._memo = {}
+
+        names = data[name_column].tolist() if name_column in data else []
+        pans = data[pan_column].tolist() if pan_column in data else [None] * len(names)
+
+        for position, (name, pan) in enumerate(zip(names, pans)):
+            parts = normalize_name(name)
+            name_id = self.exact.get(' '.join(parts))
+            if name_id is None:
+                name_id = len(self.names)
+                self.exact[' '.join(parts)] = name_id
+                self.names.append(parts)
+                self.rows.append([])
+                self.first_pan.append(None)
+                for part in set(parts):
+                    self.tokens.setdefault(part, set()).add(name_id)
+                    for sub in _substrings(part):
+                        self.substrings.setdefault(sub, set()).add(name_id)
+
+            self.rows[name_id].append((position, name, pan))
+            if self.first_pan[name_id] is None and pd.notna(pan) and str(pan).strip() != "":
+                self.first_pan[name_id] = (position, pan)
+
+    def __len__(self):
+        return len(self.names)
+
+    def matching_ids(self, search_parts):
+        """Return the ids of all distinct names matching the search tokens."""
+        if not search_parts:
+            return set(range(len(self.names)))
+
+        candidates = None
+        for search_part in search_parts:
+            # Register tokens containing the search token ...
+            part_ids = set(self.substrings.get(search_part, ()))
+            # ... or contained in it.
+            for sub in _substrings(search_part):
+                part_ids |= self.tokens.get(sub, set())
+
+            candidates = part_ids if candidates is None else candidates & part_ids
+            if not candidates:
+                break
+        return candidates
+
+    def lookup(self, advisor_name, debug=None):
+        """
+        Find the PAN for an advisor name.
+
+        Parameters:
+        - advisor_name (str): The name to look up.
+        - debug (bool): Print every matching register entry. Default is the index's debug.
+
+        Returns:
+        - The PAN, or "PAN not found".
+        """
+        if not advisor_name or not self.names:
+            return "PAN not found"
+
+        if debug is None:
+            debug = self.debug
+        search_parts = normalize_name(advisor_name)
+        key = ' '.join(search_parts)
+        if key in self._memo and not debug:
+            return self._memo[key]
+
+        name_ids = self.matching_ids(search_parts)
+
+        if debug:
+            print(f"Found {sum(len(self.rows[i]) for i in name_ids)} matches for {advisor_name}")
+            if name_ids:
+                print("Matching entries:")
+                for _, name, pan in sorted(row for i in name_ids for row in self.rows[i]):
+                    print(f"Name: {name}, PAN: {pan}")
+
+        found = [self.first_pan[i] for i in name_ids if self.first_pan[i] is not None]
+        pan = min(found, key=lambda item: item[0])[1] if found else "PAN not found"
+        self._memo[key] = pan
+        return pan
+
+
+class AddressIndex:
+    """
+    Advisor -> address lookup over a master data table, built once at load
+    time instead of re-stripping and filtering the table for every invoice.
+
+    An advisor resolves to the first row whose stripped name equals it.
+    Failing that, the first row whose name contains both the advisor's first
+    and last name, as the invoice scripts' fallback does. Results are
+    memoized per advisor.
+
+    Parameters:
+    - address_data (DataFrame): The master data table.
+    - name_column (str): Column holding the advisor names.
+    - address_column (str): Column holding the addresses.
+    """
+
+    def __init__(self, address_data, name_column, address_column):
+        self.addresses = address_data[address_column].tolist()
+        self.exact = {}          # stripped name -> first row position
+        self.substrings = {}     # substring of a name token -> row positions
+        self._memo = {}
+
+        for position, name in enumerate(address_data[name_column].tolist()):
+            if not isinstance(name, str):
+                continue
+            name = name.strip()
+            self.exact.setdefault(name, position)
+            for part in set(name.split()):
+                for sub in _substrings(part):
+                    self.substrings.setdefault(sub, set()).add(position)
+
+    def lookup(self, trading_advisor, default='Address not found'):
+        """Return the address for an advisor, or default when none matches."""
+        if trading_advisor in self._memo:
+            return self._memo[trading_advisor]
+
+        position = self.exact.get(trading_advisor)
+        if position is None:
+            trading_advisor_parts = trading_advisor.split()
+            if len(trading_advisor_parts) >= 2:
+                first_name = trading_advisor_parts[0]
+                last_name = trading_advisor_parts[-1]
+                rows = self.substrings.get(first_name, set()) & self.substrings.get(last_name, set())
+                if rows:
+                    position = min(rows)
+
+        address = self.addresses[position] if position is not None else default
+        self._memo[trading_advisor] = address
+        return address
@@ -3,8 +3,28 @@ from docx import Document
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_BREAK
 from docx.shared import RGBColor
+from docx.table import Table
+from functools import lru_cache, partial
+import argparse
+import collections
+import contextlib
 import os
-import random
+import sys
+from amounts import GROUPINGS, INTERNATIONAL, PAGE_TOTAL_TEXT, add_amount_texts, amount_text_column
+from bundle import DocumentBundle
+from docx_output import document_bytes, save_document
+from failures import FAILURES_FILE, FailureReport, Isolated, invoice_problems, report_problems
+from fonts import ADVISOR_FONTS
+from invoice_template import PageTemplate, placeholder
+from journal import ProgressJournal
+from name_index import AddressIndex, NamePanIndex
+from parallel import map_jobs
+from profiling import NULL_PROFILER, RenderProfiler
+from run_report import NULL_REPORT, RunReport, timed
+from schemas import DMC_MASTER, DMC_REGISTER
+from table_writer import append_rows
+from workbook_loader import load_csv, load_sheet
+from writer import MAX_PENDING, DocumentWriter
 
 def set_header_format(cell, text, bold=True, font_size=12):
     run = cell.paragraphs[0].add_run(text)
@@ -34,88 +54,35 @@ def format_address(address):
     
     return f"{line1}\n{line2}\n{line3}"
 
-def get_advisor_pan(advisor_name, data):
+def get_advisor_pan(advisor_name, pan_index):
     """
     Find PAN for an advisor using flexible name matching across the entire dataset.
-    Uses substring matching while checking all TEAM MEMBER entries.
+    The matching rules live in NamePanIndex, which is built once per run;
+    an index built with debug=True prints every TEAM MEMBER entry matched.
     """
-    # Handle empty or invalid inputs
-    if not advisor_name or data.empty:
-        return "PAN not found"
-        
-    # Split the search name into parts
-    search_parts = advisor_name.upper().split()
-    
-    def names_match(row_name, search_name_parts):
-        if pd.isna(row_name):
-            return False
-        
-        row_parts = str(row_name).upper().split()
-        
-        # Check for exact match first
-        if ' '.join(row_parts) == ' '.join(search_name_parts):
-            return True
-            
-        # Then check for partial matches
-        matches = []
-        for search_part in search_name_parts:
-            part_match = False
-            for row_part in row_parts:
-                if search_part in row_part or row_part in search_part:
-                    part_match = True
-                    break
-            matches.append(part_match)
-        
-        return all(matches)
-    
-    # Create a mask for matching names in the entire TEAM MEMBER column
-    matching_rows = data['TEAM MEMBER'].apply(lambda x: names_match(str(x), search_parts))
-    
-    # Get all matching rows from the complete dataset
-    matches = data[matching_rows]
-    
-    # Debug: Print matching rows to verify
-    print(f"Found {len(matches)} matches for {advisor_name}")
-    if not matches.empty:
-        print("Matching entries:")
-        for idx, row in matches.iterrows():
-            print(f"Name: {row['TEAM MEMBER']}, PAN: {row['PAN']}")
-    
-    # Check each match for valid PAN
-    for _, row in matches.iterrows():
-        if pd.notna(row['PAN']) and str(row['PAN']).strip() != "":
-            return row['PAN']
-            
-    return "PAN not found"
-
-# List of fonts to choose from
-FONT_LIST = ['Calibri', 'Arial', 'Aptos Display', 'Cambria']
-
-def set_advisor_font(doc, advisor_name):
-    font_name = random.choice(FONT_LIST)
-    doc.styles['Normal'].font.name = font_name
+    return pan_index.lookup(advisor_name)
+
+def choose_advisor_font(advisor_name):
+    # The same font for the advisor on every run, so unchanged invoices are byte-identical
+    font_name = ADVISOR_FONTS.font(advisor_name)
     print(f"Using font '{font_name}' for advisor: {advisor_name}")
     return font_name
 
-def add_consolidated_invoice_to_doc(doc, invoice_date, advisor, address, total_data, year_folder, font_name, is_first_page=False, full_data=None):
-    if not is_first_page:
-        doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+def set_advisor_font(doc, advisor_name, font_name=None):
+    if font_name is None:
+        font_name = choose_advisor_font(advisor_name)
+    doc.styles['Normal'].font.name = font_name
+    return font_name
 
-    formatted_date = format_date(invoice_date)
+def add_invoice_page(doc, date_text, from_text, year_folder, amount_text, advisor, advisor_pan, font_name):
     date_paragraph = doc.add_paragraph()
-    date_run = date_paragraph.add_run(f"Date: {formatted_date}")
+    date_run = date_paragraph.add_run(f"Date: {date_text}")
     date_run.bold = True
     date_run.font.name = font_name
     
-    if address:
-        formatted_address = format_address(address)
-        from_para = doc.add_paragraph(f"From:\n{advisor}\n{formatted_address}")
-        for run in from_para.runs:
-            run.font.name = font_name
-    else:
-        from_para = doc.add_paragraph(f"From:\n{advisor}")
-        for run in from_para.runs:
-            run.font.name = font_name
+    from_para = doc.add_paragraph(from_text)
+    for run in from_para.runs:
+        run.font.name = font_name
 
     if int(year_folder.split('-')[0]) <= 2020:
         from_address = """To:
@@ -152,17 +119,15 @@ MUMBAI 400 021"""
         set_header_format(cell, header)
 
     row_cells = table.add_row().cells
-    total_amount = total_data['TOTAL AMOUNT'].sum()
-    
     row_cells[0].text = '1'
     start_year = get_start_year(year_folder)
     row_cells[1].text = f'Being amount payable for the services rendered as per the engagement letter dated 1st April {start_year}'
-    row_cells[2].text = format_amount(total_amount)
+    row_cells[2].text = amount_text
 
     total_row = table.add_row().cells
     total_row[1].text = 'Total'
     total_row[1].paragraphs[0].runs[0].bold = True
-    total_row[2].text = format_amount(total_amount)
+    total_row[2].text = amount_text
     total_row[2].paragraphs[0].runs[0].bold = True
 
     doc.add_paragraph("""
@@ -173,7 +138,6 @@ Terms & Conditions:
 4) You are requested to pay total amount Net of TDS and arrange to send TDS certificate.
     """)
 
-    advisor_pan = get_advisor_pan(advisor, full_data)  # Pass the full dataset here
     regards_para = doc.add_paragraph("Regards,")
     
     for _ in range(3):
@@ -182,7 +146,42 @@ Terms & Conditions:
     doc.add_paragraph(f"Name: {advisor}")
     doc.add_paragraph(f"PAN: {advisor_pan}")
 
-def add_consolidated_annexure_a_to_doc(doc, payee_data, font_name):
+INVOICE_FIELDS = ['DATE', 'FROM', 'AMOUNT', 'ADVISOR', 'PAN']
+
+@lru_cache(maxsize=None)
+def get_invoice_template(year_folder, font_name):
+    """The invoice page for a year and font, laid out once by add_invoice_page."""
+    def build(doc):
+        add_invoice_page(
+            doc,
+            date_text=placeholder('DATE'),
+            from_text=placeholder('FROM'),
+            year_folder=year_folder,
+            amount_text=placeholder('AMOUNT'),
+            advisor=placeholder('ADVISOR'),
+            advisor_pan=placeholder('PAN'),
+            font_name=font_name
+        )
+    return PageTemplate(build, INVOICE_FIELDS)
+
+def add_consolidated_invoice_to_doc(doc, invoice_date, advisor, address, total_data, year_folder, font_name, advisor_pan, is_first_page=False):
+    if not is_first_page:
+        doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+
+    if address:
+        from_text = f"From:\n{advisor}\n{format_address(address)}"
+    else:
+        from_text = f"From:\n{advisor}"
+
+    get_invoice_template(year_folder, font_name).append_to(doc, {
+        'DATE': format_date(invoice_date),
+        'FROM': from_text,
+        'AMOUNT': total_data[PAGE_TOTAL_TEXT].iloc[0],
+        'ADVISOR': advisor,
+        'PAN': advisor_pan
+    })
+
+def add_annexure_a_heading(doc, font_name):
     doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
     
     annexure_header = doc.add_paragraph()
@@ -200,86 +199,317 @@ def add_consolidated_annexure_a_to_doc(doc, payee_data, font_name):
         cell = table.rows[0].cells[i]
         set_header_format(cell, header)
 
-    for _, row in payee_data.iterrows():
-        new_row = table.add_row()
-        cells = new_row.cells
-        
-        cells[0].text = str(row['TEAM MEMBER'])
-        cells[1].text = str(row['PAN'])
-        cells[2].text = format_amount(row['PROFESSIONAL FEES'])
-        cells[3].text = format_amount(row['OUT OF POCKET'])
-        cells[4].text = format_amount(row['TOTAL AMOUNT'])
+    return table
 
-    total_row = table.add_row().cells
-    total_row[0].text = 'Total'
-    total_row[0].paragraphs[0].runs[0].bold = True
-    total_row[1].text = ''
-    total_row[2].text = ''
-    total_row[3].text = ''
-    total_amount = payee_data['TOTAL AMOUNT'].sum()
-    total_row[4].text = format_amount(total_amount)
-    total_row[4].paragraphs[0].runs[0].bold = True
-
-def create_consolidated_invoices_for_advisor(grouped_data, address_data, year_folder, trading_advisor, full_data):
+@lru_cache(maxsize=None)
+def get_annexure_a_template(font_name):
+    """The Annexure A heading and table header, laid out once by add_annexure_a_heading."""
+    return PageTemplate(lambda doc: add_annexure_a_heading(doc, font_name), [])
+
+def add_consolidated_annexure_a_to_doc(doc, payee_data, font_name):
+    elements = get_annexure_a_template(font_name).append_to(doc, {})
+    table = Table(elements[-1], doc._body)
+
+    append_rows(table, [
+        [str(name) for name in payee_data['TEAM MEMBER'].tolist()],
+        [str(pan) for pan in payee_data['PAN'].tolist()],
+        payee_data[amount_text_column('PROFESSIONAL FEES')].tolist(),
+        payee_data[amount_text_column('OUT OF POCKET')].tolist(),
+        payee_data[amount_text_column('TOTAL AMOUNT')].tolist()
+    ])
+
+    append_rows(table, [['Total'], [''], [''], [''], [payee_data[PAGE_TOTAL_TEXT].iloc[0]]], bold=(0, 4))
+
+def prepare_advisor_invoices(grouped_data, address_index, year_folder, trading_advisor, pan_index, report=NULL_REPORT):
+    """
+    Resolve the font, PAN and address for one advisor from the shared tables.
+    The returned job carries only this advisor's rows, so it is cheap to send
+    to a worker process. The rows' amounts are formatted here unless
+    create_invoices_for_year already formatted the whole register.
+    """
+    if PAGE_TOTAL_TEXT not in grouped_data:
+        with report.stage('amounts', year_folder, trading_advisor.strip()):
+            grouped_data = add_amount_texts(grouped_data, AMOUNT_GROUPING)
     trading_advisor = trading_advisor.strip()
+    font_name = choose_advisor_font(trading_advisor)
+    with report.stage('pan', year_folder, trading_advisor):
+        advisor_pan = get_advisor_pan(trading_advisor, pan_index)
+    with report.stage('address', year_folder, trading_advisor):
+        address = address_index.lookup(trading_advisor)
+
+    return (grouped_data, address, year_folder, trading_advisor, font_name, advisor_pan)
+
+def invoice_file_name(year_folder, trading_advisor):
+    return os.path.join(year_folder, f"Combined_Invoice_{trading_advisor.replace(' ', '_')}.docx")
+
+def build_advisor_document(job):
+    """Build one advisor's consolidated invoice document from a prepared job."""
+    grouped_data, address, year_folder, trading_advisor, font_name, advisor_pan = job
     doc = Document()
-    
-    font_name = set_advisor_font(doc, trading_advisor)
+    set_advisor_font(doc, trading_advisor, font_name)
 
     for idx, (invoice_date, date_group) in enumerate(grouped_data.groupby('Invoice Date')):
-        first_row = date_group.iloc[0].copy()
-    
-        address_data['NAME'] = address_data['NAME'].str.strip()
-        first_row['TRADING ADVISOR'] = first_row['TRADING ADVISOR'].strip()
-        
-        address = address_data[address_data['NAME'] == first_row['TRADING ADVISOR']]['Address'].values
-        
-        if len(address) == 0:
-            trading_advisor = first_row['TRADING ADVISOR']
-            trading_advisor_parts = trading_advisor.split()
-            if len(trading_advisor_parts) >= 2:
-                first_name = trading_advisor_parts[0]
-                last_name = trading_advisor_parts[-1]
-                address = address_data[(address_data['TRADING ADVISOR'].str.contains(first_name)) & (address_data['TRADING ADVISOR'].str.contains(last_name))]['Address'].values
-        
-        address = address[0] if len(address) > 0 else 'Address not found'
-
         add_consolidated_invoice_to_doc(
             doc,
             invoice_date=invoice_date,
-            advisor=first_row['TRADING ADVISOR'],
+            advisor=trading_advisor,
             address=address,
             total_data=date_group,
             year_folder=year_folder,
             font_name=font_name,
-            is_first_page=(idx == 0),
-            full_data=full_data
+            advisor_pan=advisor_pan,
+            is_first_page=(idx == 0)
         )
 
         add_consolidated_annexure_a_to_doc(doc, date_group, font_name)
 
-    payee_folder = os.path.join(year_folder)
-    os.makedirs(payee_folder, exist_ok=True)
-    file_name = os.path.join(payee_folder, f"Combined_Invoice_{trading_advisor.replace(' ', '_')}.docx")
-    doc.save(file_name)
+    return doc
+
+def render_advisor_invoices(job):
+    """
+    Build and save one advisor's consolidated invoice.
+
+    Returns:
+    - tuple: (file name, {'build': seconds, 'save': seconds})
+    """
+    grouped_data, address, year_folder, trading_advisor, font_name, advisor_pan = job
+    timings = {}
+    with timed(timings, 'build'):
+        doc = build_advisor_document(job)
+    file_name = invoice_file_name(year_folder, trading_advisor)
+    with timed(timings, 'save'):
+        save_document(doc, file_name)
+    return file_name, timings
+
+def serialize_advisor_invoices(job):
+    """
+    Build one advisor's consolidated invoice without writing it, for a bundle.
+
+    Returns:
+    - tuple: (file name, .docx bytes, {'build': seconds, 'save': seconds})
+    """
+    grouped_data, address, year_folder, trading_advisor, font_name, advisor_pan = job
+    timings = {}
+    with timed(timings, 'build'):
+        doc = build_advisor_document(job)
+    with timed(timings, 'save'):
+        data = document_bytes(doc)
+    return invoice_file_name(year_folder, trading_advisor), data, timings
+
+def create_consolidated_invoices_for_advisor(grouped_data, address_index, year_folder, trading_advisor, pan_index):
+    job = prepare_advisor_invoices(grouped_data, address_index, year_folder, trading_advisor, pan_index)
+    file_name, _ = render_advisor_invoices(job)
     print(f"Consolidated Invoice saved: {file_name}")
 
+def consolidated_invoice_bytes(grouped_data, address_index, year_folder, trading_advisor, pan_index):
+    """
+    Render one advisor's consolidated invoice to .docx bytes, without
+    writing anything to disk.
+    """
+    job = prepare_advisor_invoices(grouped_data, address_index, year_folder, trading_advisor, pan_index)
+    _, docx_bytes, _ = serialize_advisor_invoices(job)
+    return docx_bytes
+
 # Main execution logic
 file_path = 'Payment of Professional Fees 2.xlsx'
 address_file_path = 'DMC-Master-Data-1.csv' 
 sheet_names = ['2022-23']
+# Invoices finished by the current run, kept until it completes so an interrupted run can resume
+journal_path = 'dmc_invoice_progress.jsonl'
+# Digit grouping of the amounts: INTERNATIONAL (1,234,567) or INDIAN (12,34,567)
+AMOUNT_GROUPING = INTERNATIONAL
+
+def create_invoices_for_year(data, address_index, year_folder, workers=1, report=NULL_REPORT, pan_index=None, bundle=None, grouping=None,
+                             profiler=NULL_PROFILER, writer=None, failures=None, journal=None, debug_pan_matches=False):
+    """
+    Write the consolidated invoices for one year's register to year_folder/.
 
-address_data = pd.read_csv(address_file_path)
+    Parameters:
+    - data (DataFrame): The payment register for the year.
+    - address_index (AddressIndex): Advisor addresses from the master file.
+    - year_folder (str): The year, e.g. '2022-23'; also the output folder.
+    - workers (int): Processes used to render invoices.
+    - report (RunReport): Collects stage timings and counters.
+    - pan_index (NamePanIndex): NamePanIndex(data), if already built.
+    - bundle (DocumentBundle): When given, invoices go into it instead of loose files.
+    - grouping (str): Digit grouping of the amounts; default AMOUNT_GROUPING.
+    - profiler (RenderProfiler): Advisors whose invoices are profiled; they are
+      prepared and rendered in this process, not in a worker.
+    - writer (DocumentWriter): When given, invoices are written by it in the
+      background while the next ones render.
+    - failures (FailureReport): When given, advisors whose rows fail the
+      up-front checks or whose invoice raises are recorded in it and left
+      out, and the rest are still generated. Otherwise the first error stops the run.
+    - journal (ProgressJournal): When given, invoices it lists as finished are
+      skipped, and every invoice written is recorded in it once on disk.
+    - debug_pan_matches (bool): Print every TEAM MEMBER entry matched while
+      resolving each advisor's PAN. Only used when pan_index is built here.
 
-for sheet in sheet_names:
-    year_folder = sheet.replace('/', '-')
-    data = pd.read_excel(file_path, sheet_name='REVISED PAYMENTS TO TRADERS')
-    grouped_data_by_advisor = data.groupby('TRADING ADVISOR')
+    Returns:
+    - list: The invoices written (or bundled).
+    """
+    if pan_index is None:
+        # From the whole register, so PANs do not depend on which advisors are left out below
+        with report.stage('index', year_folder):
+            pan_index = NamePanIndex(data, debug=debug_pan_matches)
+    if failures is not None:
+        with report.stage('validate', year_folder):
+            problems = invoice_problems(data)
+        report_problems(problems, 'invoice', year_folder, failures)
+        data = data[~data['TRADING ADVISOR'].isin(list(problems))]
+    # Every amount and page total on the year's invoices, formatted in one pass
+    with report.stage('amounts', year_folder):
+        data = add_amount_texts(data, grouping or AMOUNT_GROUPING)
+    with report.stage('groupby', year_folder):
+        grouped_data_by_advisor = data.groupby('TRADING ADVISOR', observed=True)
     
     print(f"\nProcessing year: {year_folder}")
     print(f"Total number of invoices to be generated: {len(grouped_data_by_advisor)}")
     
-    for trading_advisor, group in grouped_data_by_advisor:
-        create_consolidated_invoices_for_advisor(group, address_data, year_folder, trading_advisor, data)
+    resumed = []
+    written = []
+    # Advisors of the jobs handed to map_jobs, which yields results in the same order
+    rendering = collections.deque()
+
+    render = render_advisor_invoices if bundle is None and writer is None else serialize_advisor_invoices
+    if failures is not None:
+        # One advisor's error is recorded instead of stopping the year
+        render = Isolated(render)
+
+    def completed(trading_advisor, result):
+        """The render result, or None when the invoice raised and was recorded."""
+        if failures is None:
+            return result
+        result, error = result
+        if error is not None:
+            failures.add('invoice', year_folder, trading_advisor, 'render', error)
+        return result
+
+    def jobs():
+        for trading_advisor, group in grouped_data_by_advisor:
+            if journal is not None and journal.is_done(invoice_file_name(year_folder, trading_advisor.strip())):
+                resumed.append(invoice_file_name(year_folder, trading_advisor.strip()))
+                report.count('resumed', 1, year_folder, trading_advisor.strip())
+                continue
+            if profiler.wants(year_folder, trading_advisor.strip()):
+                with profiler.profile(year_folder, trading_advisor.strip(), year_folder):
+                    job = prepare_advisor_invoices(group, address_index, year_folder, trading_advisor, pan_index, report)
+                    result = completed(job[3], render(job))
+                if result is None:
+                    continue
+            else:
+                job = prepare_advisor_invoices(group, address_index, year_folder, trading_advisor, pan_index, report)
+                result = None
+            report.count('rows', len(group), year_folder, job[3])
+            report.count('invoice_pages', group['Invoice Date'].nunique(), year_folder, job[3])
+            if result is not None:
+                finish(job[3], result)
+                continue
+            rendering.append(job[3])
+            yield job
+
+    def finish(trading_advisor, result):
+        if bundle is None and writer is None:
+            file_name, timings = result
+            if journal is not None:
+                journal.record(file_name, year_folder, trading_advisor)
+            print(f"Consolidated Invoice saved: {file_name}")
+        elif bundle is None:
+            file_name, docx_bytes, timings = result
+            # Journaled by the writer thread once the invoice is on disk
+            on_written = None if journal is None else partial(journal.record, file_name, year_folder, trading_advisor)
+            # Blocks while the writer is behind
+            with report.stage('queue', year_folder, trading_advisor):
+                writer.add(file_name, docx_bytes, on_written=on_written)
+            print(f"Consolidated Invoice saved: {file_name}")
+        else:
+            file_name, docx_bytes, timings = result
+            with report.stage('bundle', year_folder, trading_advisor):
+                bundle.add(file_name, docx_bytes, kind='invoice', year=year_folder, advisor=trading_advisor)
+            print(f"Consolidated Invoice bundled: {file_name}")
+        written.append(file_name)
+        report.add_timings(timings, year_folder, trading_advisor)
+        report.count('documents', 1, year_folder, trading_advisor)
+
+    for result in map_jobs(render, jobs(), workers):
+        trading_advisor = rendering.popleft()
+        result = completed(trading_advisor, result)
+        if result is not None:
+            finish(trading_advisor, result)
+    if writer is not None:
+        writer.flush()
+    if resumed:
+        print(f"Skipped {len(resumed)} invoices finished by the interrupted run for {year_folder}")
     
-    print(f"Completed processing {len(grouped_data_by_advisor)} invoices for {year_folder}")
\ No newline at end of file
+    print(f"Completed processing {len(grouped_data_by_advisor)} invoices for {year_folder}")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate consolidated DMC invoices for every trading advisor.')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to render invoices (default: 1, no pool)')
+    parser.add_argument('--amount-grouping', choices=GROUPINGS, default=AMOUNT_GROUPING, help=f'Digit grouping of amounts; indian gives Rs. 12,34,567 (default: {AMOUNT_GROUPING})')
+    parser.add_argument('--report', metavar='PATH', help='Write stage timings and counters, per year and per advisor, to this JSON file')
+    parser.add_argument('--bundle', action='store_true', help='Write each year\'s invoices into one archive, DMC_Invoices_<year>.zip, instead of loose files')
+    parser.add_argument('--profile-advisor', nargs='+', metavar='ADVISOR', help='Profile these advisors\' invoices (cProfile and tracemalloc); the profiles are written next to the invoices')
+    parser.add_argument('--profile-year', nargs='+', metavar='YEAR', help='Only profile in these years; on its own, profile every invoice of the years')
+    parser.add_argument('--write-queue', type=int, default=MAX_PENDING, metavar='N', help=f'Invoices that may wait for the background writer while the next ones render; 0 saves each one before rendering the next (default: {MAX_PENDING})')
+    parser.add_argument('--font-map', metavar='PATH', help='CSV pinning advisors\' fonts (Advisor,Font); read before the run and updated with every advisor\'s font after it')
+    parser.add_argument('--resume', action='store_true', help=f'Continue an interrupted run: skip the invoices it finished, as recorded in {journal_path}')
+    parser.add_argument('--keep-going', action='store_true', help='Skip advisors whose invoices cannot be generated instead of stopping, and list them in the failure report')
+    parser.add_argument('--debug-pan-matches', action='store_true', help='Print every TEAM MEMBER entry matched while resolving each advisor\'s PAN')
+    parser.add_argument('--failures', default=FAILURES_FILE, metavar='PATH', help=f'CSV the failure report is written to with --keep-going (default: {FAILURES_FILE})')
+    args = parser.parse_args()
+    if args.bundle and args.resume:
+        parser.error('--resume needs the loose invoice files; it cannot be combined with --bundle')
+
+    profiler = RenderProfiler(args.profile_advisor, args.profile_year,
+                              enabled=bool(args.profile_advisor or args.profile_year))
+    writer = DocumentWriter(args.write_queue) if args.write_queue > 0 and not args.bundle else None
+    report = RunReport('new_invoice_script_for_dmc', enabled=args.report is not None)
+    if args.font_map:
+        ADVISOR_FONTS.load(args.font_map)
+    failures = FailureReport() if args.keep_going else None
+    # Progress is journaled on every loose-file run, so any of them can be resumed
+    journal = None if args.bundle else ProgressJournal(journal_path, {'amount_grouping': args.amount_grouping}, resume=args.resume)
+    with report.stage('load'):
+        address_data = load_csv(address_file_path, DMC_MASTER)
+    with report.stage('index'):
+        address_index = AddressIndex(address_data, 'NAME', 'Address')
+
+    with writer or contextlib.nullcontext():
+        for sheet in sheet_names:
+            year_folder = sheet.replace('/', '-')
+            with report.stage('load', year_folder):
+                # With --keep-going a malformed amount or date is reported with its advisor instead of stopping the load
+                data = load_sheet(file_path, 'REVISED PAYMENTS TO TRADERS', DMC_REGISTER.lenient() if args.keep_going else DMC_REGISTER)
+            if args.bundle:
+                with DocumentBundle(f"DMC_Invoices_{year_folder}.zip") as bundle:
+                    create_invoices_for_year(data, address_index, year_folder, args.workers, report, bundle=bundle,
+                                             grouping=args.amount_grouping, profiler=profiler, failures=failures,
+                                             debug_pan_matches=args.debug_pan_matches)
+            else:
+                create_invoices_for_year(data, address_index, year_folder, args.workers, report,
+                                         grouping=args.amount_grouping, profiler=profiler, writer=writer, failures=failures,
+                                         journal=journal, debug_pan_matches=args.debug_pan_matches)
+    if writer is not None:
+        report.add_time('write', writer.write_seconds)
+        report.count('written', writer.written)
+    if args.font_map:
+        ADVISOR_FONTS.save(args.font_map)
+    if journal is not None:
+        if failures:
+            # Kept, so --resume retries only the invoices that failed
+            journal.close()
+        else:
+            journal.finish()
+
+    if args.report:
+        report.save(args.report)
+    if failures is not None:
+        failures.print_summary()
+        failures.save(args.failures)
+        if failures:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,26 @@
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Pt
-from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
-import pandas as pd
 import textwrap
-import os
+from functools import lru_cache, partial
+from aliases import AdvisorDirectory
+from docx_output import document_bytes, save_document
+from failures import letter_problems, report_problems
+from invoice_template import PageTemplate, clear_body, placeholder
+from profiling import NULL_PROFILER
+from schemas import EW_LETTER_MASTER, EW_LETTER_REGISTER
+from team_roster import build_team_roster
+from workbook_loader import load_csv, load_sheets
+from writer import DocumentWriter
 
 file_path = 'EW - Details of Professional Fees Paid for last 7 years 1.xlsx'
 address_file_path = 'EW Master 1(Master Data).csv' 
 sheet_names = ['2023-24']
 
-address_data = pd.read_csv(address_file_path)
+# Years add_letter_body has the terms for (Elixir Wealth Management and one year from April 01, 2023);
+# a letter for any other year would state the wrong terms
+LETTER_YEARS = ['2023-24']
 
 def format_address(address, max_line_length=40):
     """
@@ -53,148 +62,291 @@ def set_table_font(table, font_name="Roboto", font_size=11):
             for paragraph in cell.paragraphs:
                 set_font(paragraph, font_name=font_name, font_size=font_size)
 
-for sheet in sheet_names:
-    year_folder = sheet.replace('/', '-')
-    master_data = pd.read_csv('EW Master 1(Master Data).csv')
-    data = pd.read_excel('EW - Details of Professional Fees Paid for last 7 years 1.xlsx', sheet_name=sheet)
-    trading_advisor_list = list(data['TRADING ADVISOR'].drop_duplicates().dropna())
-    filtered_data = data[['TRADING ADVISOR', 'PAYEE', 'PAN']]
-    grouped_data_by_advisor = filtered_data.groupby('TRADING ADVISOR')
-    ta_payee_mapping = grouped_data_by_advisor.agg({
-        "PAN": list,
-        "PAYEE": list
-    }).reset_index()
-
-    for current_trading_advisor in trading_advisor_list:
-        current_trading_advisor = current_trading_advisor.strip()
-        print(current_trading_advisor)
-        if current_trading_advisor == "MITESH DOSHI":
-            current_trading_advisor = "MITESH JAYANTIBHAI DOSHI"
-        elif current_trading_advisor == "MITUL MORABIA":
-            current_trading_advisor = "MITUL MOHANLAL MORABIYA"
-
-        # Address lookup
-        current_trading_advisor_new = master_data[(master_data['Name'] == current_trading_advisor)]
-        current_trading_advisor_address = current_trading_advisor_new['Address'].iloc[0]
-        print(current_trading_advisor_address)
-        address_text = format_address(current_trading_advisor_address)
+def add_letter_body(doc, letter_year, current_trading_advisor, address_text, advisor_pan):
+    """
+    Add everything in the engagement letter except the team table: the
+    letter with its terms and signature block, and the Annexure A heading.
+    """
+    # Title
+    title = doc.add_paragraph("ENGAGEMENT LETTER\n")
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    set_font(title, font_name="Roboto", font_size=11)
+
+    # Date
+    date = doc.add_paragraph(f"April 01, {letter_year}", style='Normal')
+    set_font(date, font_name="Roboto", font_size=11)
+
+    # "To" section
+    to_para = doc.add_paragraph()
+    to_para.add_run(f"To,\n{current_trading_advisor},\n{address_text}")
+    set_font(to_para, font_name="Roboto", font_size=11)
+
+    # Subject line
+    subject_para = doc.add_paragraph("Subject: Appointment as Trading Advisor")
+    set_font(subject_para, font_name="Roboto", font_size=11)
+
+    # Introduction
+    intro = doc.add_paragraph(
+        "Elixir Wealth Management Private Limited (hereinafter referred to as “the Company”) is a company incorporated under the erstwhile provisions of the Companies Act, 1956 carrying on the business of securities trading across various market segments."
+    )
+    set_font(intro, font_name="Roboto", font_size=11)
+
+    # Content paragraph
+    content = doc.add_paragraph(
+        "Considering your expertise in the subject matter, the Company is desirous of appointing your goodself as a trading advisor (hereinafter referred to as “TA”) with respect to its trading operations and undertake trading activities on its behalf including but not limited to trading, jobbing, arbitrage, hedging etc."
+    )
+    set_font(content, font_name="Roboto", font_size=11)
+
+    # Terms and Conditions section
+    tnc = doc.add_paragraph("The terms and conditions for your appointment would be as under:")
+    set_font(tnc, font_name="Roboto", font_size=12)
+
+    terms_and_conditions = [
+        "The Company shall provide all the necessary infrastructure to you, including trading terminals of the Bombay Stock Exchange and the National Stock Exchange, trading/algo software, charting software, Wi-Fi, internet, web access, television, furniture and fixtures, electricity, water, air conditioning, telephone/s lines, etc.",
+        "We understand that you would be assisted by your team members (hereinafter referred to as 'the team/team members'), the details of which are as per Annexure 'A'.",
+        "You and your team shall be permitted to use the facilities described in para 1 above. You and team shall devote your skill, time, ability and attention to conducting trading/jobbing/arbitrage/hedging transactions/strategies on the exchange/s in the best interest of the Company. You and your team shall be responsible for all trading-related activities of the team.",
+        "You shall execute/instruct to execute all the transactions in the Unique Client Code of the Company and only for the Company. The Company shall also provide the requisite funds to enable you to undertake transactions on the exchange/s through a SEBI registered Broker in the Company’s client code.",
+        "You and your team agree to keep an interest-free security deposit, as may be mutually agreed from time to time, the proceeds of which will be utilized by the Company at its sole discretion.",
+        "You and your team agree to carry on said business in complete confidentiality and shall not divulge trading positions, strategies, etc., or any other information related to the said business to anyone whatsoever.",
+        "You shall charge fees for the services rendered by you and your team and shall periodically provide necessary instructions for disbursal of the same. The Company will make payment to you and your team as detailed in the instruction note after appropriate deduction of tax at source as per the provisions of the Income-tax Act, 1961.",
+        "As mentioned earlier, you may also, if agreed upon by the Company, appoint/employ other persons referred to as your team to assist you in your trading activity. Your team agrees to abide by the terms and conditions as set out in this letter and confirm the same. New team members may be introduced from time to time at your sole discretion. Necessary intimation will be sent by you to the Company on introduction or removal of any team member.",
+        "You and your team shall implement the terms of this agreement in good faith and due diligence in the best interest of the Company.",
+        "Nothing in this arrangement shall constitute or be deemed to constitute a partnership, relationship of principal and agent or employer and employee between any of the parties, and none of them shall have any authority to bind any of the other parties in any way except for the purposes of the business of the Company.",
+        "You or your team members shall not undertake any personal trading in the Unique Client Code of the Company under any circumstances. This shall be construed as 'unauthorized' trading activity and liable for damages by the Company.",
+        "You and your team shall hereby comply with all the applicable rules and regulations, without limitation to, SEBI (Prohibition of Fraudulent and Unfair Trade Practices Relating to Securities Market) Regulations, Exchange guidelines and regulations, and any amendments and changes thereto, or any other act/s, and any such guidelines as may be prescribed from time to time by the Company.",
+        "This arrangement shall be for one year from April 01, 2023, but the Company reserves the right to terminate at any time without giving any prior notice or modify any terms and conditions of this letter from time to time as may be deemed necessary by the Company."
+    ]
+
+    for term in terms_and_conditions:
+        paragraph = doc.add_paragraph(term+"\n", style='List Number')
+        set_font(paragraph, font_name="Roboto", font_size=11)
+
+    # Signature section
+    sign_table = doc.add_table(rows=1, cols=2)
+    sign_table.style = 'Table Grid'
+    sign_table.autofit = True
+
+    sign_table.cell(0, 0).text = "For Elixir Wealth Management Pvt. Ltd,\n\n\n\nDipan Mehta\nDirector"
+    sign_table.cell(0, 1).text = f"I Accept\n\n\n\nName: {current_trading_advisor} \nPAN : {advisor_pan}"
+
+    set_table_font(sign_table, font_name="Roboto", font_size=11)
+
+    # Annexure A on a new page
+    doc.add_page_break()
+    annexure = doc.add_paragraph("Annexure A\n")
+    annexure.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    set_font(annexure, font_name="Roboto", font_size=11)
+    members = doc.add_paragraph(
+        "The following is the list of team members of the TA presently working with him which may change from time to time as per commercial prudence of the TA.\n"
+    )
+    set_font(members, font_name="Roboto", font_size=11)
+
+# Build each letter in a document reused across letters, from a copy of the
+# letter body laid out once per year with only the advisor name, address and
+# PAN filled in
+USE_BASE_DOCUMENT = True
+
+LETTER_FIELDS = ['ADVISOR', 'ADDRESS', 'PAN']
+
+@lru_cache(maxsize=None)
+def get_letter_template(letter_year):
+    """The letter body for one year, with fonts applied, laid out once by add_letter_body."""
+    return PageTemplate(
+        lambda doc: add_letter_body(doc, letter_year, *[placeholder(name) for name in LETTER_FIELDS]),
+        LETTER_FIELDS
+    )
+
+@lru_cache(maxsize=None)
+def get_base_document(letter_year):
+    """An empty document for one year's letters; cleared and refilled for every letter."""
+    return Document()
+
+def build_engagement_letter(current_trading_advisor, directory, letter_year, team_roster):
+    """
+    Lay out one advisor's engagement letter.
+
+    With USE_BASE_DOCUMENT the returned document is shared between letters
+    and is cleared by the next call; save or serialize it before then.
+
+    Parameters:
+    - current_trading_advisor (str): The advisor as written in the register.
+    - directory (AdvisorDirectory): Master data with the advisor's name, address and PAN.
+    - letter_year (str): The year the letter is dated in.
+    - team_roster (dict): build_team_roster(data, 'PAYEE') for the year.
+
+    Returns:
+    - tuple: (Document, the advisor's name as printed in the letter)
+
+    Raises:
+    - KeyError: The advisor is not in the master data or the alias file.
+    """
+    register_name = current_trading_advisor.strip()
+    print(register_name)
+
+    # Name as spelled in the master data (through the alias file), address and PAN
+    current_trading_advisor, current_trading_advisor_address, advisor_pan = directory.lookup(register_name)
+    print(current_trading_advisor_address)
+    address_text = format_address(current_trading_advisor_address)
 
+    if USE_BASE_DOCUMENT:
+        doc = get_base_document(letter_year)
+        clear_body(doc)
+        get_letter_template(letter_year).append_to(doc, {
+            'ADVISOR': current_trading_advisor,
+            'ADDRESS': address_text,
+            'PAN': advisor_pan,
+        })
+    else:
         # Initialize the document
         doc = Document()
+        add_letter_body(doc, letter_year, current_trading_advisor, address_text, advisor_pan)
+
+    # The team is listed under the advisor's name in the register
+    team = team_roster.get(register_name)
+    if team is not None and current_trading_advisor != register_name:
+        # An aliased advisor is paid under their master data name; they are not their own team member
+        team = [(member, pan) for member, pan in team if member != current_trading_advisor]
+
+    if team is not None:
+        # Create the table
+        table = doc.add_table(rows=1, cols=3)
+        table.style = 'Table Grid'
+
+        # Add headers
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = 'PAYEE'
+        hdr_cells[1].text = 'PAN'
+        hdr_cells[2].text = 'SIGNATURE'
+
+        # If the advisor has a team, add rows for the payees
+        if len(team) > 0:
+            for key, value in team:
+                row_cells = table.add_row().cells
+                row_cells[0].text = str(key)
+                row_cells[1].text = str(value)
+        else:
+            # Otherwise add two empty rows
+            for _ in range(2):
+                dummy_row = table.add_row().cells
+                dummy_row[0].text = ''
+                dummy_row[1].text = ''
+                dummy_row[2].text = ''
+
+        # Apply font style to the entire table
+        set_table_font(table, font_name="Roboto", font_size=12)
+
+    return doc, current_trading_advisor
+
+def get_letter_year(year_folder):
+    """The year a letter is dated in, from the year it is for."""
+    return year_folder.split('-')[0]
+
+def letter_file_name(year_folder, advisor):
+    """Where an advisor's letter for year_folder goes; advisor as named in the master data."""
+    return f"EL-{year_folder}/Engagement_Letter_{advisor}_{year_folder}.docx"
+
+def check_letter_year(year_folder):
+    """
+    Raises:
+    - ValueError: add_letter_body has no terms for year_folder.
+    """
+    if year_folder not in LETTER_YEARS:
+        raise ValueError(f"No engagement letter terms for {year_folder}; letters can be generated for {', '.join(LETTER_YEARS)}")
+
+def engagement_letter_bytes(current_trading_advisor, directory, year_folder, team_roster):
+    """
+    Render one advisor's engagement letter for year_folder to .docx bytes,
+    without writing anything to disk.
+    """
+    check_letter_year(year_folder)
+    doc, _ = build_engagement_letter(current_trading_advisor, directory, get_letter_year(year_folder), team_roster)
+    return document_bytes(doc)
+
+def create_engagement_letters(data, master_data, year_folder, team_roster=None, bundle=None, profiler=NULL_PROFILER, writer=None, failures=None,
+                              journal=None, directory=None):
+    """
+    Write the engagement letters for one year's register to EL-<year_folder>/.
+
+    Parameters:
+    - data (DataFrame): The payment register for the year.
+    - master_data (DataFrame): Master data with Name, Address and PAN per advisor.
+    - year_folder (str): The year the letters are for, e.g. '2023-24'.
+    - team_roster (dict): build_team_roster(data, 'PAYEE'), if already computed.
+    - bundle (DocumentBundle): When given, letters go into it instead of loose files.
+    - profiler (RenderProfiler): Advisors whose letters are profiled, into EL-<year_folder>/.
+    - writer (DocumentWriter): When given, letters are written by it in the
+      background while the next ones are built.
+    - failures (FailureReport): When given, advisors that cannot be resolved
+      or whose letter raises are recorded in it, and the rest are still
+      generated. Otherwise the skipped advisors are printed and an error stops the run.
+    - journal (ProgressJournal): When given, letters it lists as finished are
+      skipped, and every letter written is recorded in it once on disk.
+    - directory (AdvisorDirectory): AdvisorDirectory(master_data, 'Name'), if already built.
+
+    Returns:
+    - list: The letters written (or bundled).
+
+    Raises:
+    - ValueError: year_folder is not in LETTER_YEARS.
+    """
+    check_letter_year(year_folder)
+    letter_year = get_letter_year(year_folder)
+    trading_advisor_list = list(data['TRADING ADVISOR'].drop_duplicates().dropna())
+    # Advisor -> ordered (team member, PAN) pairs for Annexure A
+    if team_roster is None:
+        team_roster = build_team_roster(data, 'PAYEE')
+    file_names = []
+
+    # Resolve every advisor up front; those missing from the master data or
+    # with no address there are reported and skipped
+    if directory is None:
+        directory = AdvisorDirectory(master_data, 'Name')
+    resolved, problems = letter_problems(trading_advisor_list, directory)
+    report_problems(problems, 'letter', year_folder, failures)
+
+    resumed = []
+    for register_name, (master_name, _, _) in resolved.items():
+        file_name = letter_file_name(year_folder, master_name)
+        if journal is not None and journal.is_done(file_name):
+            resumed.append(file_name)
+            continue
+        try:
+            with profiler.profile(year_folder, register_name.strip(), f"EL-{year_folder}"):
+                doc, current_trading_advisor = build_engagement_letter(register_name, directory, letter_year, team_roster)
+                if bundle is not None:
+                    bundle.add(file_name, document_bytes(doc), kind='letter', year=year_folder, advisor=current_trading_advisor)
+                elif writer is not None:
+                    # Serialized now: the next letter reuses the document.
+                    # The writer thread journals it once it is on disk.
+                    on_written = None if journal is None else partial(journal.record, file_name, year_folder, register_name.strip())
+                    writer.add(file_name, document_bytes(doc), on_written=on_written)
+                else:
+                    save_document(doc, file_name)
+                    if journal is not None:
+                        journal.record(file_name, year_folder, register_name.strip())
+        except Exception as e:
+            # A failed write is not the advisor's; it stops the run
+            if failures is None or isinstance(e, OSError):
+                raise
+            # Under the register's name, so the failure can be matched back to its rows
+            failures.add('letter', year_folder, register_name.strip(), 'render', e)
+            continue
+        file_names.append(file_name)
+
+    if writer is not None:
+        writer.flush()
+    if resumed:
+        print(f"Skipped {len(resumed)} letters finished by the interrupted run for {year_folder}")
+    return file_names
+
+def main():
+    address_data = load_csv(address_file_path, EW_LETTER_MASTER)
+    sheets = load_sheets(file_path, sheet_names, EW_LETTER_REGISTER)
+
+    with DocumentWriter() as writer:
+        for sheet in sheet_names:
+            year_folder = sheet.replace('/', '-')
+            create_engagement_letters(sheets[sheet], address_data, year_folder, writer=writer)
 
-        # Title
-        title = doc.add_paragraph("ENGAGEMENT LETTER\n")
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        set_font(title, font_name="Roboto", font_size=11)
-
-        # Date
-        date = doc.add_paragraph(f"April 01, {sheet.split('-')[0]}", style='Normal')
-        set_font(date, font_name="Roboto", font_size=11)
-
-        # "To" section
-        to_para = doc.add_paragraph()
-        to_para.add_run(f"To,\n{current_trading_advisor},\n{address_text}")
-        set_font(to_para, font_name="Roboto", font_size=11)
-
-        # Subject line
-        subject_para = doc.add_paragraph("Subject: Appointment as Trading Advisor")
-        set_font(subject_para, font_name="Roboto", font_size=11)
-
-        # Introduction
-        intro = doc.add_paragraph(
-            "Elixir Wealth Management Private Limited (hereinafter referred to as “the Company”) is a company incorporated under the erstwhile provisions of the Companies Act, 1956 carrying on the business of securities trading across various market segments."
-        )
-        set_font(intro, font_name="Roboto", font_size=11)
-
-        # Content paragraph
-        content = doc.add_paragraph(
-            "Considering your expertise in the subject matter, the Company is desirous of appointing your goodself as a trading advisor (hereinafter referred to as “TA”) with respect to its trading operations and undertake trading activities on its behalf including but not limited to trading, jobbing, arbitrage, hedging etc."
-        )
-        set_font(content, font_name="Roboto", font_size=11)
-
-        # Terms and Conditions section
-        tnc = doc.add_paragraph("The terms and conditions for your appointment would be as under:")
-        set_font(tnc, font_name="Roboto", font_size=12)
-
-        terms_and_conditions = [
-            "The Company shall provide all the necessary infrastructure to you, including trading terminals of the Bombay Stock Exchange and the National Stock Exchange, trading/algo software, charting software, Wi-Fi, internet, web access, television, furniture and fixtures, electricity, water, air conditioning, telephone/s lines, etc.",
-            "We understand that you would be assisted by your team members (hereinafter referred to as 'the team/team members'), the details of which are as per Annexure 'A'.",
-            "You and your team shall be permitted to use the facilities described in para 1 above. You and team shall devote your skill, time, ability and attention to conducting trading/jobbing/arbitrage/hedging transactions/strategies on the exchange/s in the best interest of the Company. You and your team shall be responsible for all trading-related activities of the team.",
-            "You shall execute/instruct to execute all the transactions in the Unique Client Code of the Company and only for the Company. The Company shall also provide the requisite funds to enable you to undertake transactions on the exchange/s through a SEBI registered Broker in the Company’s client code.",
-            "You and your team agree to keep an interest-free security deposit, as may be mutually agreed from time to time, the proceeds of which will be utilized by the Company at its sole discretion.",
-            "You and your team agree to carry on said business in complete confidentiality and shall not divulge trading positions, strategies, etc., or any other information related to the said business to anyone whatsoever.",
-            "You shall charge fees for the services rendered by you and your team and shall periodically provide necessary instructions for disbursal of the same. The Company will make payment to you and your team as detailed in the instruction note after appropriate deduction of tax at source as per the provisions of the Income-tax Act, 1961.",
-            "As mentioned earlier, you may also, if agreed upon by the Company, appoint/employ other persons referred to as your team to assist you in your trading activity. Your team agrees to abide by the terms and conditions as set out in this letter and confirm the same. New team members may be introduced from time to time at your sole discretion. Necessary intimation will be sent by you to the Company on introduction or removal of any team member.",
-            "You and your team shall implement the terms of this agreement in good faith and due diligence in the best interest of the Company.",
-            "Nothing in this arrangement shall constitute or be deemed to constitute a partnership, relationship of principal and agent or employer and employee between any of the parties, and none of them shall have any authority to bind any of the other parties in any way except for the purposes of the business of the Company.",
-            "You or your team members shall not undertake any personal trading in the Unique Client Code of the Company under any circumstances. This shall be construed as 'unauthorized' trading activity and liable for damages by the Company.",
-            "You and your team shall hereby comply with all the applicable rules and regulations, without limitation to, SEBI (Prohibition of Fraudulent and Unfair Trade Practices Relating to Securities Market) Regulations, Exchange guidelines and regulations, and any amendments and changes thereto, or any other act/s, and any such guidelines as may be prescribed from time to time by the Company.",
-            "This arrangement shall be for one year from April 01, 2023, but the Company reserves the right to terminate at any time without giving any prior notice or modify any terms and conditions of this letter from time to time as may be deemed necessary by the Company."
-        ]
-
-        for term in terms_and_conditions:
-            paragraph = doc.add_paragraph(term+"\n", style='List Number')
-            set_font(paragraph, font_name="Roboto", font_size=11)
-
-        # Signature section
-        sign_table = doc.add_table(rows=1, cols=2)
-        sign_table.style = 'Table Grid'
-        sign_table.autofit = True
-
-        sign_table.cell(0, 0).text = "For Elixir Wealth Management Pvt. Ltd,\n\n\n\nDipan Mehta\nDirector"
-        sign_table.cell(0, 1).text = f"I Accept\n\n\n\nName: {current_trading_advisor} \nPAN : {current_trading_advisor_new['PAN'].iloc[0]}"
-
-        set_table_font(sign_table, font_name="Roboto", font_size=11)
-
-        # Annexure A on a new page
-        doc.add_page_break()
-        annexure = doc.add_paragraph("Annexure A\n")
-        annexure.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        set_font(annexure, font_name="Roboto", font_size=11)
-        members = doc.add_paragraph(
-            "The following is the list of team members of the TA presently working with him which may change from time to time as per commercial prudence of the TA.\n"
-        )
-        set_font(members, font_name="Roboto", font_size=11)
-        
-        filtered_ta_payee_mapping = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == current_trading_advisor]
-
-        for index, each_row in filtered_ta_payee_mapping.iterrows():
-            trading_advisor = each_row['TRADING ADVISOR']
-            pan_list = each_row["PAN"]
-            payee_list = each_row['PAYEE']
-            pan_payee_dict = {}
-
-            # Populate pan_payee_dict with valid entries
-            for i in range(len(pan_list)):
-                if payee_list[i] not in pan_payee_dict and payee_list[i] != trading_advisor:
-                    pan_payee_dict[payee_list[i]] = pan_list[i]
-
-            # Create the table
-            table = doc.add_table(rows=1, cols=3)
-            table.style = 'Table Grid'
-
-            # Add headers
-            hdr_cells = table.rows[0].cells
-            hdr_cells[0].text = 'PAYEE'
-            hdr_cells[1].text = 'PAN'
-            hdr_cells[2].text = 'SIGNATURE'
-
-            # If pan_payee_dict is not empty, add rows for the payees
-            if len(pan_payee_dict) > 0:
-                for key, value in pan_payee_dict.items():
-                    row_cells = table.add_row().cells
-                    row_cells[0].text = str(key)
-                    row_cells[1].text = str(value)
-            else:
-                # If pan_payee_dict is empty, add two empty rows
-                for _ in range(2):
-                    dummy_row = table.add_row().cells
-                    dummy_row[0].text = ''
-                    dummy_row[1].text = ''
-                    dummy_row[2].text = ''
-
-            # Apply font style to the entire table
-            set_table_font(table, font_name="Roboto", font_size=12)
-        
-        os.makedirs(f"EL-{year_folder}", exist_ok=True)
-        doc.save(f"EL-{year_folder}/Engagement_Letter_{current_trading_advisor}_{year_folder}.docx")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+# Jobs submitted to the pool per worker before the oldest result is taken
+JOBS_PER_WORKER = 2
+
+
+def map_jobs(func, jobs, workers=1):
+    """
+    Yield func(job) for every job, in job order.
+
+    With workers > 1 the jobs are spread across a process pool; func must
+    be a module-level function and each job picklable. Keep jobs small:
+    everything in a job is pickled and copied to the worker.
+
+    At most workers * JOBS_PER_WORKER jobs are in flight: the next job is
+    only submitted once the oldest result has been taken, so results never
+    pile up faster than the caller (e.g. a bounded DocumentWriter) consumes them.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield func(job)
+        return
+
+    window = workers * JOBS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        try:
+            for job in jobs:
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(func, job))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Stopped early (an error, Ctrl-C): don't start the jobs still waiting
+            for future in pending:
+                future.cancel()
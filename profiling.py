@@ -0,0 +1,87 @@
+import contextlib
+import cProfile
+import os
+import tracemalloc
+
+# Stack frames kept per allocation, and allocation sites listed in the summary
+TRACE_FRAMES = 10
+TOP_ALLOCATIONS = 30
+
+
+def _normalize(name):
+    return ' '.join(str(name).split()).upper()
+
+
+class RenderProfiler:
+    """
+    Captures a CPU profile (cProfile) and an allocation snapshot
+    (tracemalloc) while chosen advisors' documents are prepared and
+    rendered, and writes them next to the documents:
+
+    - Profile_<advisor>.prof: load with pstats or snakeviz
+    - Profile_<advisor>.tracemalloc: the snapshot, for tracemalloc.Snapshot.load
+    - Profile_<advisor>.alloc.txt: peak memory and the top allocation sites
+
+    Parameters:
+    - advisors (list): Advisors to profile, as written in the register. None for every advisor.
+    - years (list): Years to profile, e.g. ['2023-24']. None for every year.
+    - enabled (bool): When False nothing is profiled.
+    """
+
+    def __init__(self, advisors=None, years=None, enabled=True):
+        self.advisors = None if advisors is None else {_normalize(advisor) for advisor in advisors}
+        self.years = None if years is None else set(years)
+        self.enabled = enabled
+
+    def wants(self, year, advisor):
+        """Whether the advisor's document for the year is profiled."""
+        return (self.enabled
+                and (self.years is None or year in self.years)
+                and (self.advisors is None or _normalize(advisor) in self.advisors))
+
+    @contextlib.contextmanager
+    def profile(self, year, advisor, output_dir):
+        """
+        Profile the block when wants(year, advisor), writing the results to output_dir.
+        """
+        if not self.wants(year, advisor):
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            self._save(profiler, snapshot, peak, year, advisor, output_dir)
+
+    def _save(self, profiler, snapshot, peak, year, advisor, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f"Profile_{advisor.strip().replace(' ', '_')}")
+
+        profiler.dump_stats(f"{base}.prof")
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ])
+        snapshot.dump(f"{base}.tracemalloc")
+
+        with open(f"{base}.alloc.txt", 'w', encoding='utf-8') as f:
+            f.write(f"{advisor.strip()} ({year})\n")
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.2f} MiB\n\n")
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites:\n")
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        print(f"Profile saved: {base}.prof")
+
+
+NULL_PROFILER = RenderProfiler(enabled=False)
@@ -0,0 +1,244 @@
+"""
+Reconcile the TDS deducted per PAN against the invoiced amounts in the
+payment registers, per PAN and per fiscal year.
+
+Both sides are summed per (PAN, fiscal year) and joined on those keys, so
+every payee is compared once, however many years and TDS files are given:
+- register: TOTAL AMOUNT of each payee's rows; the fiscal year is the year
+  of the register sheet
+- TDS export: Amount of each deduction; the fiscal year (April to March)
+  comes from the Tran Date
+
+Only the FEE_SECTIONS deductions are compared unless --all-sections is
+given. A professional fee paid to someone outside the register, e.g. a
+depository's charges, still shows up as "TDS, no invoice".
+
+Usage:
+    python reconcile.py --entity DMC --tds extracted_details.csv
+    python reconcile.py --entity EW --tds "EW - TDS FY 2022-23.csv" "EW - TDS FY 2023-24.csv"
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch import ENTITIES
+from excel_formatting import extract_details_columns
+from workbook_loader import load_sheets
+
+# TDS sections deducted on professional fees; other deductions (e.g. 94A,
+# interest) have no invoice behind them
+FEE_SECTIONS = ['4JB']
+
+# Largest difference, in rupees, still counted as a match
+TOLERANCE = 1.0
+
+KEYS = ['PAN', 'FY']
+
+MATCHED = 'matched'
+AMOUNT_MISMATCH = 'amount mismatch'
+NO_TDS = 'invoiced, no TDS'
+NO_INVOICE = 'TDS, no invoice'
+
+
+def fiscal_year(dates):
+    """
+    The Indian fiscal year (April to March) of each date, e.g. '2022-23'.
+
+    Parameters:
+    - dates (Series): datetime64 values.
+
+    Returns:
+    - Series: The fiscal year of each date; missing where the date is.
+    """
+    start = dates.dt.year - (dates.dt.month < 4)
+    valid = start.notna()
+    start = start[valid].astype(int)
+    years = pd.Series(np.nan, index=dates.index, dtype=object)
+    years[valid] = start.astype(str) + '-' + ((start + 1) % 100).astype(str).str.zfill(2)
+    return years
+
+
+def _pans(values):
+    # Compared without case or surrounding spaces, so 'abcde1234f ' matches ABCDE1234F
+    return values.astype(object).str.strip().str.upper()
+
+
+def _amounts(values):
+    # The raw export writes amounts as "500,000.00"; extracted_details.csv as floats
+    return pd.to_numeric(values.astype(str).str.replace(',', '', regex=False), errors='coerce')
+
+
+def load_tds(paths, sections=FEE_SECTIONS):
+    """
+    Read TDS exports (raw, or already split by excel_formatting.py) into
+    one deduction per row.
+
+    Parameters:
+    - paths (list): TDS CSV files; any number of years each.
+    - sections (list): TDS sections to keep. None keeps every section.
+
+    Returns:
+    - DataFrame: PAN, FY, Name, Amount (paid) and TDS (deducted) per deduction.
+    """
+    frames = []
+    for path in paths:
+        data = pd.read_csv(path)
+        if 'PAN' not in data.columns:
+            data[['Name', 'PAN', 'Address']] = extract_details_columns(data['Party Name'])
+
+        # Repeated page headers and totals have no PAN or no date
+        dates = pd.to_datetime(data['Tran Date'], format='%d/%m/%Y', errors='coerce')
+        tds = pd.DataFrame({
+            'PAN': _pans(data['PAN']),
+            'FY': fiscal_year(dates),
+            'Name': data['Name'],
+            'Section': data['Section'],
+            'Amount': _amounts(data['Amount']),
+            # "TDS Surcharge Cess": TDS, surcharge and cess on separate lines
+            'TDS': _amounts(data['TDS Surcharge Cess'].astype(str).str.split('\n').str[0]),
+        })
+        frames.append(tds.dropna(subset=['PAN', 'FY', 'Amount']))
+
+    tds = pd.concat(frames, ignore_index=True)
+    if sections is not None:
+        tds = tds[tds['Section'].isin(sections)]
+    return tds
+
+
+def invoice_totals(entity, years=None):
+    """
+    Total invoiced per (PAN, fiscal year) from an entity's payment register.
+
+    Parameters:
+    - entity (str): 'EW' or 'DMC'.
+    - years (list): Register years to read. Default is every year.
+
+    Returns:
+    - DataFrame: PAN, FY, Name, Invoiced and Invoice rows.
+    """
+    config = ENTITIES[entity]
+    years = years or list(config['sheets'])
+    sheets = load_sheets(config['register'], [config['sheets'][year] for year in years], config['register_schema'])
+
+    frames = []
+    for year in years:
+        register = sheets[config['sheets'][year]]
+        frames.append(pd.DataFrame({
+            'PAN': _pans(register['PAN']),
+            'FY': year,
+            'Name': register[config['member_column']].astype(object),
+            'Amount': register['TOTAL AMOUNT'],
+        }).dropna(subset=['PAN', 'Amount']))
+
+    rows = pd.concat(frames, ignore_index=True)
+    return rows.groupby(KEYS, sort=False).agg(
+        Name=('Name', 'first'),
+        Invoiced=('Amount', 'sum'),
+        **{'Invoice rows': ('Amount', 'size')},
+    ).reset_index()
+
+
+def reconcile(invoices, tds, tolerance=TOLERANCE):
+    """
+    Join invoice totals and TDS deductions on (PAN, fiscal year).
+
+    Parameters:
+    - invoices (DataFrame): invoice_totals().
+    - tds (DataFrame): load_tds().
+    - tolerance (float): Largest difference still counted as a match.
+
+    Returns:
+    - DataFrame: One row per (PAN, fiscal year) on either side, with the
+      amounts of both, Difference (invoiced - TDS amount) and Status,
+      mismatches first.
+    """
+    deducted = tds.groupby(KEYS, sort=False).agg(
+        **{'TDS name': ('Name', 'first'), 'TDS amount': ('Amount', 'sum'),
+           'TDS deducted': ('TDS', 'sum'), 'TDS rows': ('Amount', 'size')},
+    ).reset_index()
+
+    joined = invoices.merge(deducted, on=KEYS, how='outer', indicator=True)
+    joined['Name'] = joined['Name'].fillna(joined.pop('TDS name'))
+    for column in ['Invoiced', 'Invoice rows', 'TDS amount', 'TDS deducted', 'TDS rows']:
+        joined[column] = joined[column].fillna(0)
+    joined['Difference'] = (joined['Invoiced'] - joined['TDS amount']).round(2)
+
+    side = joined.pop('_merge')
+    joined['Status'] = np.select(
+        [side == 'left_only', side == 'right_only', joined['Difference'].abs() > tolerance],
+        [NO_TDS, NO_INVOICE, AMOUNT_MISMATCH],
+        MATCHED,
+    )
+    joined['_matched'] = joined['Status'] == MATCHED
+    joined = joined.sort_values(['_matched', 'FY', 'PAN'], kind='stable').drop(columns='_matched')
+    return joined.reset_index(drop=True)
+
+
+def summarize_by_year(result):
+    """Per fiscal year: PANs in each status, and the amounts on both sides."""
+    counts = pd.crosstab(result['FY'], result['Status'])
+    totals = result.groupby('FY')[['Invoiced', 'TDS amount', 'Difference']].sum()
+    return counts.join(totals)
+
+
+def summarize_by_pan(result):
+    """Per PAN: the amounts on both sides over all years, and the years that do not match."""
+    mismatched = result['Status'] != MATCHED
+    summary = result.groupby('PAN').agg(
+        Name=('Name', 'first'),
+        Invoiced=('Invoiced', 'sum'),
+        **{'TDS amount': ('TDS amount', 'sum')},
+        Difference=('Difference', 'sum'),
+    )
+    years = result[mismatched].groupby('PAN')['FY']
+    summary['Mismatched years'] = years.agg(', '.join).reindex(summary.index, fill_value='')
+
+    # PANs with the most mismatched years first, then the largest differences
+    order = pd.DataFrame({'years': years.size().reindex(summary.index, fill_value=0),
+                          'difference': summary['Difference'].abs()})
+    return summary.loc[order.sort_values(['years', 'difference'], ascending=False).index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile TDS deducted per PAN against the invoiced amounts.')
+    parser.add_argument('--entity', choices=sorted(ENTITIES), default='DMC', help='Register to reconcile (default: DMC)')
+    parser.add_argument('--years', nargs='+', help='Register years to include, e.g. 2022-23 (default: every year)')
+    parser.add_argument('--tds', nargs='+', default=['extracted_details.csv'], help='TDS exports, raw or from excel_formatting.py (default: extracted_details.csv)')
+    parser.add_argument('--all-sections', action='store_true', help=f'Include every TDS section, not only {", ".join(FEE_SECTIONS)}')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help=f'Largest difference in rupees counted as a match (default: {TOLERANCE})')
+    parser.add_argument('--output', default='reconciliation.csv', help='Per PAN and year CSV to write; the per PAN summary goes next to it as <name>_by_pan.csv')
+    args = parser.parse_args()
+
+    unknown = [year for year in args.years or [] if year not in ENTITIES[args.entity]['sheets']]
+    if unknown:
+        parser.error(f"no {args.entity} register for {', '.join(unknown)}")
+
+    invoices = invoice_totals(args.entity, args.years)
+    tds = load_tds(args.tds, None if args.all_sections else FEE_SECTIONS)
+    # Only the years both sides cover: a TDS file spanning more years, or a
+    # register year with no TDS file given, is not a mismatch
+    years = set(invoices['FY']) & set(tds['FY'])
+    invoices = invoices[invoices['FY'].isin(years)]
+    tds = tds[tds['FY'].isin(years)]
+
+    result = reconcile(invoices, tds, args.tolerance)
+    by_pan = summarize_by_pan(result)
+
+    result.to_csv(args.output, index=False)
+    pan_output = f"{os.path.splitext(args.output)[0]}_by_pan.csv"
+    by_pan.to_csv(pan_output)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:,.2f}'.format):
+        print(f"\nReconciliation of {args.entity} invoices against {len(tds)} TDS deductions, per fiscal year:")
+        print(summarize_by_year(result).to_string())
+        mismatches = result[result['Status'] != MATCHED]
+        print(f"\n{len(mismatches)} of {len(result)} PAN-years do not match:")
+        if len(mismatches):
+            print(mismatches[['FY', 'PAN', 'Name', 'Invoiced', 'TDS amount', 'Difference', 'Status']].to_string(index=False))
+    print(f"\nReconciliation saved: {args.output} and {pan_output}")
+
+
+if __name__ == '__main__':
+    main()
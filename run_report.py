@@ -0,0 +1,128 @@
+import contextlib
+import datetime
+import json
+import os
+import time
+
+
+@contextlib.contextmanager
+def timed(timings, name):
+    """
+    Add the time spent in the block to timings[name]. timings is a plain
+    dict, so worker processes can fill one in and return it with their result.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class RunReport:
+    """
+    Stage timers and counters for one generator run, kept per run, per year
+    and per advisor, and written out as JSON.
+
+    Stages used by the generators: load, index, validate, amounts, groupby, pan,
+    address, build, save, bundle, queue (waiting for the background
+    writer) and write (the writer's own time, for the run).
+
+    Parameters:
+    - script (str): Name of the generator, recorded in the report.
+    - enabled (bool): When False every call is a no-op.
+    """
+
+    def __init__(self, script, enabled=True):
+        self.script = script
+        self.enabled = enabled
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.years = {}
+        self.advisors = {}
+
+    def _entries(self, year, advisor):
+        entries = [self]
+        if year is not None:
+            entries.append(self.years.setdefault(year, _Entry()))
+        if advisor is not None:
+            key = f"{year}/{advisor}" if year is not None else advisor
+            if key not in self.advisors:
+                self.advisors[key] = _Entry(year=year, advisor=advisor)
+            entries.append(self.advisors[key])
+        return entries
+
+    @contextlib.contextmanager
+    def stage(self, name, year=None, advisor=None):
+        """Time the block as stage name, for the run and the given year/advisor."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, year, advisor)
+
+    def add_time(self, name, seconds, year=None, advisor=None):
+        if not self.enabled:
+            return
+        for entry in self._entries(year, advisor):
+            stage = entry.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            stage['seconds'] += seconds
+            stage['calls'] += 1
+
+    def add_timings(self, timings, year=None, advisor=None):
+        """Merge a dict filled in by timed(), e.g. one returned by a worker."""
+        for name, seconds in timings.items():
+            self.add_time(name, seconds, year, advisor)
+
+    def count(self, name, n=1, year=None, advisor=None):
+        if not self.enabled:
+            return
+        for entry in self._entries(year, advisor):
+            entry.counters[name] = entry.counters.get(name, 0) + n
+
+    def to_dict(self):
+        advisors = sorted(self.advisors.values(), key=lambda entry: entry.total_seconds(), reverse=True)
+        return {
+            'script': self.script,
+            'started': self.started,
+            'wall_seconds': round(time.perf_counter() - self._start, 4),
+            'stages': _rounded(self.stages),
+            'counters': dict(self.counters),
+            'years': {year: entry.to_dict() for year, entry in self.years.items()},
+            # Slowest first
+            'advisors': [entry.to_dict() for entry in advisors],
+        }
+
+    def save(self, path):
+        """Write the report atomically. Does nothing when the report is disabled."""
+        if not self.enabled:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        print(f"Run report saved: {path}")
+
+
+# Shared disabled report for callers that don't collect one
+NULL_REPORT = RunReport(None, enabled=False)
+
+
+class _Entry:
+    def __init__(self, **labels):
+        self.labels = labels
+        self.stages = {}
+        self.counters = {}
+
+    def total_seconds(self):
+        return sum(stage['seconds'] for stage in self.stages.values())
+
+    def to_dict(self):
+        return dict(self.labels, seconds=round(self.total_seconds(), 4),
+                    stages=_rounded(self.stages), counters=dict(self.counters))
+
+
+def _rounded(stages):
+    return {name: {'seconds': round(stage['seconds'], 4), 'calls': stage['calls']}
+            for name, stage in stages.items()}
@@ -0,0 +1,153 @@
+import copy
+import hashlib
+
+import pandas as pd
+
+
+class SchemaError(ValueError):
+    """An input is missing a column the generators need, or holds values of the wrong type."""
+
+
+# Column a lenient schema adds: the cells of each row that could not be
+# converted, e.g. "OUT OF POCKET 'nil'"; missing where the row is fine
+INVALID_CELLS = 'INVALID CELLS'
+
+
+class TableSchema:
+    """
+    The columns the generators read from one input file, and how to store
+    them in memory. Loading through a schema keeps only these columns:
+
+    - names: categoricals sharing one sorted set of categories, so name
+      columns compare with each other and group in the same order as strings
+    - pans: categoricals
+    - amounts: float64
+    - dates: datetime64
+    - text: kept as loaded (addresses)
+
+    Parameters:
+    - name (str): Identifies the schema in caches and error messages.
+    - names, pans, amounts, dates, text (list): Columns of each kind.
+    - strict (bool): When False, see lenient().
+    """
+
+    def __init__(self, name, names=(), pans=(), amounts=(), dates=(), text=(), strict=True):
+        self.name = name
+        self.strict = strict
+        self.names = list(names)
+        self.pans = list(pans)
+        self.amounts = list(amounts)
+        self.dates = list(dates)
+        self.text = list(text)
+        self.columns = self.names + self.pans + self.amounts + self.dates + self.text
+
+    @property
+    def fingerprint(self):
+        """
+        Hash of the schema's name and its (column, kind) pairs, so frames
+        cached under an earlier definition of the schema are not reused.
+        """
+        kinds = {'names': self.names, 'pans': self.pans, 'amounts': self.amounts, 'dates': self.dates, 'text': self.text}
+        pairs = sorted((column, kind) for kind, columns in kinds.items() for column in columns)
+        return hashlib.sha256(repr((self.name, pairs, self.strict)).encode('utf-8')).hexdigest()[:16]
+
+    def lenient(self):
+        """
+        This schema, loading an amount or date that does not convert as
+        missing instead of raising SchemaError. Each row's unconverted cells
+        are noted in INVALID_CELLS, so the advisors they belong to can be
+        reported and left out.
+        """
+        schema = copy.copy(self)
+        schema.strict = False
+        return schema
+
+    def usecols(self, column):
+        """usecols callable for read_excel/read_csv: parse only the schema's columns."""
+        return column in self.columns
+
+    def apply(self, data, source):
+        """
+        Check data against the schema and return its lean copy.
+
+        Parameters:
+        - data (DataFrame): The input as read.
+        - source (str): The file (and sheet) it came from, for error messages.
+
+        Returns:
+        - DataFrame: Only the schema's columns, in the schema's dtypes.
+
+        Raises:
+        - SchemaError: A column is missing, or (when strict) an amount or date
+          column holds values that are not amounts or dates.
+        """
+        missing = [column for column in self.columns if column not in data.columns]
+        if missing:
+            raise SchemaError(f"{source} is missing column(s) {', '.join(missing)} needed for {self.name}")
+
+        data = data[self.columns].copy()
+        invalid = None if self.strict else pd.Series('', index=data.index, dtype=object)
+
+        for column in self.amounts:
+            converted = pd.to_numeric(data[column], errors='coerce')
+            _check_converted(data[column], converted, source, column, 'amounts', invalid)
+            data[column] = converted.astype('float64')
+
+        for column in self.dates:
+            converted = pd.to_datetime(data[column], errors='coerce')
+            _check_converted(data[column], converted, source, column, 'dates', invalid)
+            data[column] = converted
+
+        if self.names:
+            values = pd.concat([data[column] for column in self.names]).dropna().unique()
+            names = pd.CategoricalDtype(sorted(values))
+            for column in self.names:
+                data[column] = data[column].astype(names)
+
+        for column in self.pans:
+            data[column] = data[column].astype('category')
+
+        if invalid is not None:
+            data[INVALID_CELLS] = invalid.str.rstrip('; ').where(invalid != '')
+        return data
+
+
+def _check_converted(original, converted, source, column, kind, invalid=None):
+    # invalid: per-row notes of a lenient load; None raises instead
+    rows = original.notna() & converted.isna()
+    if not rows.any():
+        return
+    bad = original[rows]
+    examples = ', '.join(repr(value) for value in bad.unique()[:3])
+    message = f"{source} column {column} should hold {kind}; found {examples} in {len(bad)} row(s)"
+    if invalid is None:
+        raise SchemaError(message)
+    print(f"{message}; left empty")
+    invalid[rows] = invalid[rows] + f"{column} " + bad.map(repr) + '; '
+
+
+# Payment registers: one row per payment to a team member
+EW_REGISTER = TableSchema(
+    'EW register',
+    names=['TRADING ADVISOR', 'PAYEE'],
+    pans=['PAN'],
+    amounts=['PROFESSIONAL FEES', 'OUT OF POCKET', 'TOTAL AMOUNT'],
+    dates=['Invoice Date'],
+)
+DMC_REGISTER = TableSchema(
+    'DMC register',
+    names=['TRADING ADVISOR', 'TEAM MEMBER'],
+    pans=['PAN'],
+    amounts=['PROFESSIONAL FEES', 'OUT OF POCKET', 'TOTAL AMOUNT'],
+    dates=['Invoice Date'],
+)
+# The same registers as the engagement letters and aliases.py read them:
+# only the advisors, team members and PANs, so a malformed amount or date
+# does not stop the letters
+EW_LETTER_REGISTER = TableSchema('EW letter register', names=['TRADING ADVISOR', 'PAYEE'], pans=['PAN'])
+DMC_LETTER_REGISTER = TableSchema('DMC letter register', names=['TRADING ADVISOR', 'TEAM MEMBER'], pans=['PAN'])
+
+# Master data: advisor addresses (and PANs for the engagement letters)
+EW_INVOICE_MASTER = TableSchema('EW invoice master', names=['TRADING ADVISOR'], text=['ADDRESS'])
+EW_LETTER_MASTER = TableSchema('EW letter master', names=['Name'], pans=['PAN'], text=['Address'])
+DMC_MASTER = TableSchema('DMC master', names=['NAME'], pans=['PAN'], text=['Address'])
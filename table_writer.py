@@ -0,0 +1,42 @@
+from copy import deepcopy
+from docx.oxml.ns import qn
+
+
+def append_rows(table, columns, bold=()):
+    """
+    Append one row per position of the given column vectors to a table.
+
+    The result is the same XML as table.add_row() followed by setting
+    cell.text on every cell, but the row is laid out once as a prototype
+    and every other row is a copy of it with its text swapped in, without
+    going through python-docx's row and cell proxies.
+
+    Parameters:
+    - table (Table): The python-docx table to extend.
+    - columns (list): One sequence of cell texts per table column.
+    - bold (iterable): Indexes of the columns whose text is bold.
+    """
+    rows = list(zip(*columns))
+    if not rows:
+        return
+
+    # Prototype row, built and then detached from the table
+    prototype = table.add_row()
+    for index, cell in enumerate(prototype.cells):
+        cell.text = 'x'
+        if index in bold:
+            cell.paragraphs[0].runs[0].bold = True
+    tbl = table._tbl
+    tbl.remove(prototype._tr)
+
+    for values in rows:
+        tr = deepcopy(prototype._tr)
+        for t, value in zip(list(tr.iter(qn('w:t'))), values):
+            if value == '' or any(char in value for char in '\t\r\n'):
+                # Let python-docx lay out empty runs, tabs and breaks
+                t.getparent().text = value
+                continue
+            t.text = value
+            if len(value.strip()) < len(value):
+                t.set(qn('xml:space'), 'preserve')
+        tbl.append(tr)
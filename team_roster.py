@@ -0,0 +1,25 @@
+def build_team_roster(data, member_column='PAYEE', advisor_column='TRADING ADVISOR', pan_column='PAN'):
+    """
+    Every trading advisor's team for Annexure A, computed once per sheet.
+
+    Team members are listed once each, in the order they first appear, with
+    the PAN of their first row; the advisor's own rows are left out.
+
+    Parameters:
+    - data (DataFrame): The payment register for one year.
+    - member_column (str): Column naming the team member ('PAYEE' or 'TEAM MEMBER').
+    - advisor_column (str): Column naming the trading advisor.
+    - pan_column (str): Column holding the team member's PAN.
+
+    Returns:
+    - dict: Advisor, exactly as written in the register -> list of (member, PAN)
+      tuples. Advisors whose only rows are their own map to an empty list.
+    """
+    rows = data[[advisor_column, member_column, pan_column]].dropna(subset=[advisor_column])
+    roster = {advisor: [] for advisor in rows[advisor_column].unique()}
+
+    team = rows.drop_duplicates(subset=[advisor_column, member_column])
+    team = team[team[member_column] != team[advisor_column]]
+    for advisor, member, pan in zip(team[advisor_column].tolist(), team[member_column].tolist(), team[pan_column].tolist()):
+        roster[advisor].append((member, pan))
+    return roster
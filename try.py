@@ -4,12 +4,16 @@ from docx.shared import Pt
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 import pandas as pd
+from aliases import AdvisorDirectory
+from failures import letter_problems, report_problems
+from workbook_loader import load_csv, load_sheets
 
-file_path = 'EW - Details of Professional Fees Paid for last 7 years.xlsx'
+file_path = 'EW - Details of Professional Fees Paid for last 7 years 1.xlsx'
 address_file_path = 'EW Master 1(Master Data).csv' 
 sheet_names = ['2018-19']
 
-address_data = pd.read_csv(address_file_path)
+address_data = load_csv(address_file_path)
+sheets = load_sheets(file_path, sheet_names)
 
 def set_font(paragraph, font_name="Roboto", font_size=12):
     for run in paragraph.runs:
@@ -30,8 +34,8 @@ def set_table_font(table, font_name="Arial", font_size=12):
 for sheet in sheet_names:
     year_folder = sheet.replace('/', '-')
     # names and address - load from EW details of file
-    master_data = pd.read_csv('EW Master 1(Master Data).csv')
-    data = pd.read_excel('EW - Details of Professional Fees Paid for last 7 years 1.xlsx', sheet_name=sheet)
+    master_data = address_data
+    data = sheets[sheet]
     trading_advisor_list = list(data['TRADING ADVISOR'].drop_duplicates().dropna())
     filtered_data = data[['TRADING ADVISOR','PAYEE','PAN']]
     grouped_data_by_advisor = filtered_data.groupby('TRADING ADVISOR')
@@ -40,22 +44,15 @@ for sheet in sheet_names:
         "PAYEE": list
     }).reset_index()
 
-    for current_trading_advisor in trading_advisor_list:
-
-        # for ele in master_data['Name']:
-        #     print(ele)
-        #     print(len(ele))
-
-        # break
-        current_trading_advisor = current_trading_advisor.strip()
-        print(current_trading_advisor)
-        if current_trading_advisor == "MITESH DOSHI":
-            current_trading_advisor = current_trading_advisor.replace(current_trading_advisor,"MITESH JAYANTIBHAI DOSHI")
-        elif current_trading_advisor == "MITUL MORABIA":
-            current_trading_advisor = current_trading_advisor.replace(current_trading_advisor,"MITUL MOHANLAL MORABIYA")
-        # find the address from master data for the current trading advisor
-        current_trading_advisor_new = master_data[(master_data['Name'] == current_trading_advisor)]
-        current_trading_advisor_address = current_trading_advisor_new['Address'].iloc[0]
+    # Resolve every advisor up front; those missing from the master data or
+    # with no address there are reported and skipped
+    directory = AdvisorDirectory(master_data, 'Name')
+    resolved, problems = letter_problems(trading_advisor_list, directory)
+    report_problems(problems, 'letter', year_folder)
+
+    for register_name, (current_trading_advisor, current_trading_advisor_address, _) in resolved.items():
+        print(register_name.strip())
+        # name and address as in the master data (through the alias file)
         print(current_trading_advisor_address)
         
         # Initialize the document
@@ -137,7 +134,7 @@ for sheet in sheet_names:
         set_font(members, font_name="Roboto", font_size=12)
 
         # table in the end
-        filtered_ta_payee_mapping = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == current_trading_advisor]
+        filtered_ta_payee_mapping = ta_payee_mapping[ta_payee_mapping['TRADING ADVISOR'] == register_name]
 
         for index,each_row in filtered_ta_payee_mapping.iterrows():
             trading_advisor = each_row['TRADING ADVISOR']
@@ -0,0 +1,114 @@
+import os
+import pandas as pd
+import input_cache
+from schemas import SchemaError
+
+# Every sheet the invoice and engagement letter scripts use, per workbook.
+# The first time a workbook is opened all of these are parsed in one pass.
+WORKBOOK_SHEETS = {
+    'EW - Details of Professional Fees Paid for last 7 years 1.xlsx': [
+        '2017-18', '2018-19', '2019-20', '2020-21', '2021-22', '2023-24'
+    ],
+    'Payment of Professional Fees 2.xlsx': ['REVISED PAYMENTS TO TRADERS'],
+}
+
+# Reuse sheets parsed by an earlier run when the file contents are unchanged
+USE_INPUT_CACHE = True
+
+# Parsed inputs, keyed by absolute path, modification time and schema fingerprint
+_loaded_workbooks = {}
+_loaded_csvs = {}
+
+
+def _file_key(file_path, schema=None):
+    path = os.path.abspath(file_path)
+    return path, os.path.getmtime(path), schema.fingerprint if schema else None
+
+
+def _cache_name(sheet, schema):
+    # Lean copies are cached separately from the full sheet, and per
+    # definition of the schema, so editing a schema never serves old frames
+    if schema is None:
+        return sheet
+    return f"{sheet or ''}|{schema.name}|{schema.fingerprint}"
+
+
+def load_sheets(file_path, sheet_names, schema=None):
+    """
+    Read the requested sheets of a workbook, opening the file only once.
+
+    The workbook is parsed together with every sheet registered for it in
+    WORKBOOK_SHEETS, so later calls (from any generator in the same process)
+    are served from memory. Sheets already in the on-disk input cache for the
+    current file contents are not parsed at all. The returned DataFrames are
+    shared; copy before modifying them.
+
+    Parameters:
+    - file_path (str): Path to the .xlsx file.
+    - sheet_names (list): Sheets to return.
+    - schema (TableSchema): When given, only the schema's columns are parsed
+      and every sheet is checked and stored as the schema says.
+
+    Returns:
+    - dict: Sheet name -> DataFrame, in the order requested.
+
+    Raises:
+    - SchemaError: A requested sheet does not match the schema.
+    """
+    key = _file_key(file_path, schema)
+    sheets = _loaded_workbooks.setdefault(key, {})
+
+    if USE_INPUT_CACHE:
+        for sheet in sheet_names:
+            if sheet not in sheets:
+                cached = input_cache.get(file_path, _cache_name(sheet, schema))
+                if cached is not None:
+                    sheets[sheet] = cached
+
+    missing = [sheet for sheet in sheet_names if sheet not in sheets]
+    if missing:
+        registered = WORKBOOK_SHEETS.get(os.path.basename(file_path), [])
+        to_read = missing + [sheet for sheet in registered if sheet not in sheets and sheet not in missing]
+        with pd.ExcelFile(file_path) as workbook:
+            to_read = [sheet for sheet in to_read if sheet in workbook.sheet_names or sheet in missing]
+            parsed = pd.read_excel(workbook, sheet_name=to_read, usecols=schema.usecols if schema else None)
+        if schema is not None:
+            for sheet in list(parsed):
+                try:
+                    parsed[sheet] = schema.apply(parsed[sheet], f"{os.path.basename(file_path)} [{sheet}]")
+                except SchemaError:
+                    if sheet in missing:
+                        raise
+                    # Only read ahead; it fails when it is asked for
+                    del parsed[sheet]
+        sheets.update(parsed)
+        if USE_INPUT_CACHE:
+            for sheet, data in parsed.items():
+                input_cache.put(file_path, _cache_name(sheet, schema), data)
+
+    return {sheet: sheets[sheet] for sheet in sheet_names}
+
+
+def load_sheet(file_path, sheet_name, schema=None):
+    """Read a single sheet through load_sheets."""
+    return load_sheets(file_path, [sheet_name], schema)[sheet_name]
+
+
+def load_csv(file_path, schema=None):
+    """
+    Read a master data CSV once per process, from the input cache when the
+    file is unchanged. With a schema only its columns are read, checked and
+    stored as it says. The returned DataFrame is shared; copy before
+    modifying it.
+    """
+    key = _file_key(file_path, schema)
+    if key not in _loaded_csvs:
+        data = input_cache.get(file_path, _cache_name(None, schema)) if USE_INPUT_CACHE else None
+        if data is None:
+            data = pd.read_csv(file_path, usecols=schema.usecols if schema else None)
+            if schema is not None:
+                data = schema.apply(data, os.path.basename(file_path))
+            if USE_INPUT_CACHE:
+                input_cache.put(file_path, _cache_name(None, schema), data)
+        _loaded_csvs[key] = data
+    return _loaded_csvs[key]
@@ -0,0 +1,95 @@
+import queue
+import threading
+import time
+from docx_output import write_bytes
+
+# Serialized documents waiting to be written before add() blocks
+MAX_PENDING = 8
+
+
+class DocumentWriter:
+    """
+    Writes serialized documents to disk on a background thread, so the
+    next document is rendered while the last one is being written.
+
+    add() blocks while max_pending documents are waiting, which bounds the
+    memory held in serialized documents. Takes documents the same way as
+    DocumentBundle.add, so the generators hand either one their bytes.
+
+    A failed write is raised from the next add(), flush() or close();
+    documents queued after it are not written.
+
+    Parameters:
+    - max_pending (int): Documents that may wait to be written.
+    """
+
+    def __init__(self, max_pending=MAX_PENDING):
+        self.queued = 0
+        self.written = 0
+        self.write_seconds = 0.0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='document-writer', daemon=True)
+        self._thread.start()
+
+    def add(self, file_name, data, on_written=None, **details):
+        """
+        Queue one document to be written to file_name. on_written, if given,
+        is called on the writer thread once the document is on disk. details
+        are accepted for compatibility with DocumentBundle.add and ignored.
+        """
+        self._raise_error()
+        self._queue.put((file_name, data, on_written))
+        self.queued += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    start = time.perf_counter()
+                    file_name, data, on_written = item
+                    write_bytes(data, file_name)
+                    self.write_seconds += time.perf_counter() - start
+                    self.written += 1
+                    if on_written is not None:
+                        on_written()
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def flush(self):
+        """Wait until every queued document is written."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Write the remaining documents and stop the writer thread.
+
+        Raises:
+        - RuntimeError: Fewer documents were written than queued.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+        if self.written != self.queued:
+            raise RuntimeError(f"{self.queued} documents queued but only {self.written} written")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Finish what was queued, without masking the original error
+            self._queue.put(None)
+            self._thread.join()